@@ -56,6 +56,7 @@ class ParsedIntent:
     needs_clarification: bool
     clarification_questions: List[str]
     summary: str
+    llm_failed: bool = False         # True if the LLM call failed and pattern matching was used
 
 
 class IntentParser:
@@ -150,7 +151,9 @@ Respond with a JSON object containing:
             return self._parse_response(response, message)
         except Exception as e:
             print(f"Error parsing intent: {e}")
-            return self._fallback_parse(message)
+            intent = self._fallback_parse(message)
+            intent.llm_failed = True
+            return intent
     
     def parse_sync(self, message: str) -> ParsedIntent:
         """
@@ -340,26 +340,27 @@ class ProductMatcher:
             match_reason=reason
         )
     
+    def match_to_dict(self, match: MatchedProduct) -> Dict[str, Any]:
+        """Convert a single MatchedProduct to dictionary for JSON serialization"""
+        return {
+            "product_id": match.product_id,
+            "name": match.name,
+            "clean_name": match.clean_name,
+            "price": match.price,
+            "original_price": match.original_price,
+            "brand": match.brand,
+            "category": match.category,
+            "url": match.url,
+            "image_path": match.image_path,
+            "match_score": match.match_score,
+            "match_reason": match.match_reason
+        }
+    
     def to_dict(self, result: MatchResult) -> Dict[str, Any]:
         """Convert MatchResult to dictionary for JSON serialization"""
         return {
             "query": result.query,
-            "matches": [
-                {
-                    "product_id": m.product_id,
-                    "name": m.name,
-                    "clean_name": m.clean_name,
-                    "price": m.price,
-                    "original_price": m.original_price,
-                    "brand": m.brand,
-                    "category": m.category,
-                    "url": m.url,
-                    "image_path": m.image_path,
-                    "match_score": m.match_score,
-                    "match_reason": m.match_reason
-                }
-                for m in result.matches
-            ],
+            "matches": [self.match_to_dict(m) for m in result.matches],
             "best_match": {
                 "product_id": result.best_match.product_id,
                 "name": result.best_match.name,
@@ -28,7 +28,7 @@ from ai.product_matcher import ProductMatcher
 from ai.order_extractor import OrderExtractor
 from whatsapp.whatsapp_client import WhatsAppClient
 from whatsapp.message_handler import MessageHandler
-from whatsapp.webhook_handler import WebhookHandler
+from whatsapp.webhook_handler import WebhookHandler, json_loads
 from email.notification_service import NotificationService
 from delivery_order.do_generator import DeliveryOrderGenerator
 from delivery_order.pdf_generator import PDFGenerator
@@ -115,11 +115,31 @@ def create_app(catalog_path: Optional[str] = None) -> 'FastAPI':
     do_generator = DeliveryOrderGenerator()
     pdf_generator = PDFGenerator()
     
+    whatsapp_client = WhatsAppClient()
+    message_handler.set_send_callbacks(
+        whatsapp_client.send_text,
+        send_interactive=whatsapp_client.send_interactive_buttons,
+        send_products=whatsapp_client.send_product_options
+    )
+    
+    # Incoming WhatsApp messages are queued on the message handler, whose
+    # workers process each sender's messages in order and reply through
+    # the send callbacks; the webhook workers only hand them off
+    async def on_message(incoming):
+        return await message_handler.handle_message(
+            phone_number=incoming.from_number,
+            message_text=incoming.text or "",
+            message_type=incoming.message_type
+        )
+    
+    webhook_handler.set_message_callback(on_message)
+    
     # Store services in app state
     app.state.intent_parser = intent_parser
     app.state.product_matcher = product_matcher
     app.state.order_extractor = order_extractor
     app.state.message_handler = message_handler
+    app.state.whatsapp_client = whatsapp_client
     app.state.webhook_handler = webhook_handler
     app.state.do_generator = do_generator
     app.state.pdf_generator = pdf_generator
@@ -153,8 +173,8 @@ if FASTAPI_AVAILABLE:
         # Generate session ID if not provided
         session_id = request.session_id or f"session_{hash(request.message)}"
         
-        # Process the message
-        result = await message_handler.handle_message(
+        # Process the message inline so the reply can be returned directly
+        result = await message_handler.process_message(
             phone_number=session_id,
             message_text=request.message
         )
@@ -371,7 +391,6 @@ if FASTAPI_AVAILABLE:
     async def handle_whatsapp_webhook(req: Request):
         """Handle incoming WhatsApp messages"""
         webhook_handler: WebhookHandler = req.app.state.webhook_handler
-        message_handler: MessageHandler = req.app.state.message_handler
         
         # Get raw body for signature validation
         body = await req.body()
@@ -380,25 +399,17 @@ if FASTAPI_AVAILABLE:
         if not webhook_handler.validate_signature(body, signature):
             raise HTTPException(status_code=401, detail="Invalid signature")
         
-        # Parse payload
-        payload = json.loads(body)
-        
-        # Set up message callback
-        async def on_message(incoming):
-            result = await message_handler.handle_message(
-                phone_number=incoming.from_number,
-                message_text=incoming.text or "",
-                message_type=incoming.message_type
-            )
-            # In production, send response via WhatsApp client
-            return result
-        
-        webhook_handler.set_message_callback(on_message)
+        # Parse payload directly from the raw body bytes
+        try:
+            payload = json_loads(body)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Invalid JSON")
         
-        # Process webhook
-        result = await webhook_handler.handle_webhook(payload)
+        # Acknowledge now; the payload is processed in the background
+        if not webhook_handler.enqueue(payload):
+            raise HTTPException(status_code=503, detail="Webhook queue full")
         
-        return result
+        return {"ok": True}
 
 else:
     # Fallback for when FastAPI is not available
@@ -6,6 +6,8 @@ using the email client and templates.
 """
 
 import os
+import asyncio
+from html import unescape
 from typing import Optional, Dict, Any, List
 from dataclasses import dataclass
 from datetime import datetime
@@ -22,6 +24,7 @@ class NotificationConfig:
     support_email: str = ""
     send_admin_alerts: bool = True
     send_customer_emails: bool = True
+    send_text_body: bool = True
     
     @classmethod
     def from_env(cls) -> 'NotificationConfig':
@@ -31,7 +34,8 @@ class NotificationConfig:
             admin_name=os.getenv('ADMIN_NAME', 'UnidBox Admin'),
             support_email=os.getenv('SUPPORT_EMAIL', 'support@unidbox.com'),
             send_admin_alerts=os.getenv('SEND_ADMIN_ALERTS', 'true').lower() == 'true',
-            send_customer_emails=os.getenv('SEND_CUSTOMER_EMAILS', 'true').lower() == 'true'
+            send_customer_emails=os.getenv('SEND_CUSTOMER_EMAILS', 'true').lower() == 'true',
+            send_text_body=os.getenv('SEND_TEXT_BODY', 'true').lower() == 'true'
         )
 
 
@@ -78,7 +82,7 @@ class NotificationService:
         
         return OrderData(
             order_id=order_dict.get('order_id', 'N/A'),
-            items=items,
+            items=tuple(items),
             subtotal=summary.get('subtotal', 0),
             tax=summary.get('tax', 0),
             shipping=summary.get('shipping', 0),
@@ -108,31 +112,89 @@ class NotificationService:
             Dictionary of send results for each notification
         """
         results = {}
+        messages = self._build_confirmation_messages(order, customer_email)
+        
+        # Send customer confirmation, then admin alert
+        for key, message in messages.items():
+            results[key] = await self.email_client.send(message)
+        
+        return results
+    
+    def _build_confirmation_messages(
+        self,
+        order: Dict[str, Any],
+        customer_email: Optional[str] = None
+    ) -> Dict[str, EmailMessage]:
+        """Render the customer and admin confirmation messages for an order"""
+        messages = {}
         order_data = self._order_dict_to_data(order)
         
-        # Send customer confirmation
         email = customer_email or order_data.customer_email
         if email and self.config.send_customer_emails:
-            html = EmailTemplates.order_confirmation(order_data)
-            message = EmailMessage(
+            rendered = EmailTemplates.order_confirmation(order_data)
+            messages['customer'] = EmailMessage(
                 to=[email],
-                subject=f"Order Confirmed - {order_data.order_id}",
-                html_body=html,
-                text_body=self._html_to_text(html)
+                subject=rendered.subject,
+                html_body=rendered.html,
+                text_body=self._text_body(rendered.html)
             )
-            results['customer'] = await self.email_client.send(message)
         
-        # Send admin alert
         if self.config.send_admin_alerts and self.config.admin_email:
-            html = EmailTemplates.new_order_admin_alert(order_data)
-            message = EmailMessage(
+            rendered = EmailTemplates.new_order_admin_alert(order_data)
+            messages['admin'] = EmailMessage(
                 to=[self.config.admin_email],
-                subject=f"🔔 New Order - {order_data.order_id} (${order_data.total:.2f})",
-                html_body=html,
-                text_body=self._html_to_text(html)
+                subject=rendered.subject,
+                html_body=rendered.html,
+                text_body=self._text_body(rendered.html)
             )
-            results['admin'] = await self.email_client.send(message)
         
+        return messages
+    
+    async def notify_orders_confirmed(
+        self,
+        orders: List[Dict[str, Any]],
+        queue_size: int = 10
+    ) -> List[Dict[str, SendResult]]:
+        """
+        Send order confirmation notifications for a batch of orders.
+        
+        Rendering and sending are pipelined: while one message is being
+        sent, the next order's templates are rendered. The queue between
+        the two stages is bounded so rendering cannot run far ahead of
+        the email provider.
+        
+        Args:
+            orders: List of order dictionaries
+            queue_size: Maximum number of rendered messages waiting to be sent
+        
+        Returns:
+            List of send result dictionaries, one per order in input order
+        """
+        results: List[Dict[str, SendResult]] = [{} for _ in orders]
+        send_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        
+        async def render():
+            for index, order in enumerate(orders):
+                messages = self._build_confirmation_messages(order)
+                for key, message in messages.items():
+                    await send_queue.put((index, key, message))
+                # Yield so the sender can start on what is already queued
+                await asyncio.sleep(0)
+            await send_queue.put(None)
+        
+        async def send():
+            while True:
+                item = await send_queue.get()
+                if item is None:
+                    break
+                index, key, message = item
+                results[index][key] = await self.email_client.send(message)
+        
+        # If either stage fails the task group cancels the other, so the
+        # renderer cannot stay blocked on a full queue nobody is draining
+        async with asyncio.TaskGroup() as group:
+            group.create_task(render())
+            group.create_task(send())
         return results
     
     async def notify_order_shipped(
@@ -157,12 +219,12 @@ class NotificationService:
         
         email = customer_email or order_data.customer_email
         if email and self.config.send_customer_emails:
-            html = EmailTemplates.order_shipped(order_data, tracking_number)
+            rendered = EmailTemplates.order_shipped(order_data, tracking_number)
             message = EmailMessage(
                 to=[email],
-                subject=f"Your Order is On Its Way! - {order_data.order_id}",
-                html_body=html,
-                text_body=self._html_to_text(html)
+                subject=rendered.subject,
+                html_body=rendered.html,
+                text_body=self._text_body(rendered.html)
             )
             results['customer'] = await self.email_client.send(message)
         
@@ -188,12 +250,12 @@ class NotificationService:
         
         email = customer_email or order_data.customer_email
         if email and self.config.send_customer_emails:
-            html = EmailTemplates.order_delivered(order_data)
+            rendered = EmailTemplates.order_delivered(order_data)
             message = EmailMessage(
                 to=[email],
-                subject=f"Order Delivered - {order_data.order_id}",
-                html_body=html,
-                text_body=self._html_to_text(html)
+                subject=rendered.subject,
+                html_body=rendered.html,
+                text_body=self._text_body(rendered.html)
             )
             results['customer'] = await self.email_client.send(message)
         
@@ -221,7 +283,7 @@ class NotificationService:
         
         email = customer_email or order_data.customer_email
         if email and self.config.send_customer_emails:
-            html = EmailTemplates.delivery_order_attached(order_data)
+            rendered = EmailTemplates.delivery_order_attached(order_data)
             
             attachment = EmailAttachment(
                 filename=f"DO_{order_data.order_id}.pdf",
@@ -231,9 +293,9 @@ class NotificationService:
             
             message = EmailMessage(
                 to=[email],
-                subject=f"Delivery Order - {order_data.order_id}",
-                html_body=html,
-                text_body=self._html_to_text(html),
+                subject=rendered.subject,
+                html_body=rendered.html,
+                text_body=self._text_body(rendered.html),
                 attachments=[attachment]
             )
             results['customer'] = await self.email_client.send(message)
@@ -265,11 +327,17 @@ class NotificationService:
             to=to,
             subject=subject,
             html_body=html_body,
-            text_body=text_body or self._html_to_text(html_body),
+            text_body=text_body or self._text_body(html_body),
             attachments=attachments
         )
         return await self.email_client.send(message)
     
+    def _text_body(self, html: str) -> Optional[str]:
+        """Plain text alternative for an HTML body, or None when disabled"""
+        if not self.config.send_text_body:
+            return None
+        return self._html_to_text(html)
+    
     def _html_to_text(self, html: str) -> str:
         """Convert HTML to plain text (basic implementation)"""
         import re
@@ -295,12 +363,9 @@ class NotificationService:
         text = re.sub(r'\n\s*\n', '\n\n', text)
         text = re.sub(r' +', ' ', text)
         
-        # Decode HTML entities
-        text = text.replace('&nbsp;', ' ')
-        text = text.replace('&amp;', '&')
-        text = text.replace('&lt;', '<')
-        text = text.replace('&gt;', '>')
-        text = text.replace('&quot;', '"')
+        # Decode HTML entities in one pass, so escaped field values such as
+        # '&amp;lt;' come back as the literal '&lt;' the template was given
+        text = unescape(text.replace('&nbsp;', ' '))
         
         return text.strip()
 
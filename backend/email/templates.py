@@ -4,12 +4,17 @@ Email Templates Module for UnidBox Order Copilot
 This module provides HTML email templates for various order notifications.
 """
 
-from typing import List, Dict, Any, Optional
+import html
+import re
+import time
+from types import MappingProxyType
+from functools import lru_cache, wraps
+from typing import List, Dict, Any, Optional, Tuple, Sequence, Callable, NamedTuple
 from dataclasses import dataclass
 from datetime import datetime
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class OrderItem:
     """Order item for template rendering"""
     name: str
@@ -18,11 +23,11 @@ class OrderItem:
     total_price: float
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class OrderData:
     """Order data for template rendering"""
     order_id: str
-    items: List[OrderItem]
+    items: Tuple[OrderItem, ...]
     subtotal: float
     tax: float
     shipping: float
@@ -34,43 +39,180 @@ class OrderData:
     delivery_date: Optional[str]
     order_date: str
     status: str
+    
+    def __post_init__(self):
+        # Memoized templates hash their arguments, so accept any sequence
+        # of items but store a tuple
+        if not isinstance(self.items, tuple):
+            object.__setattr__(self, 'items', tuple(self.items))
 
 
-class EmailTemplates:
-    """
-    HTML email templates for UnidBox notifications.
-    
-    All templates use inline CSS for maximum email client compatibility.
-    """
+class RenderedEmail(NamedTuple):
+    """Rendered email, with the subject line its HTML title is built from"""
+    subject: str
+    html: str
+
+
+# Brand colors
+PRIMARY_COLOR = "#1e3a5f"  # Navy blue
+SECONDARY_COLOR = "#f59e0b"  # Amber/Orange
+SUCCESS_COLOR = "#10b981"  # Green
+WARNING_COLOR = "#f59e0b"  # Amber
+ERROR_COLOR = "#ef4444"  # Red
+BACKGROUND_COLOR = "#f3f4f6"
+TEXT_COLOR = "#1f2937"
+
+# Read-only view of the brand palette for other modules
+BRAND_COLORS = MappingProxyType({
+    'primary': PRIMARY_COLOR,
+    'secondary': SECONDARY_COLOR,
+    'success': SUCCESS_COLOR,
+    'warning': WARNING_COLOR,
+    'error': ERROR_COLOR,
+    'background': BACKGROUND_COLOR,
+    'text': TEXT_COLOR,
+})
+
+
+# Whitespace between tags, stripped from static markup at import
+_INTER_TAG_WHITESPACE = re.compile(r'>\s+<')
+
+
+def _minify(markup: str) -> str:
+    """Strip indentation and newlines between tags"""
+    return _INTER_TAG_WHITESPACE.sub('><', markup).strip()
+
+
+# Order-independent blocks, rendered once at import rather than on
+# every send
+_CONFIRMED_BADGE = _minify(f"""
+    <div style="text-align: center; margin-bottom: 30px;">
+        <div style="display: inline-block; background-color: {SUCCESS_COLOR}; color: white; padding: 10px 20px; border-radius: 50px; font-size: 14px; font-weight: bold;">
+            ✓ Order Confirmed
+        </div>
+    </div>
+""")
+
+_SHIPPED_BADGE = _minify(f"""
+    <div style="text-align: center; margin-bottom: 30px;">
+        <div style="display: inline-block; background-color: {SECONDARY_COLOR}; color: white; padding: 10px 20px; border-radius: 50px; font-size: 14px; font-weight: bold;">
+            📦 Order Shipped
+        </div>
+    </div>
+""")
+
+_DELIVERED_BADGE = _minify(f"""
+    <div style="text-align: center; margin-bottom: 30px;">
+        <div style="display: inline-block; background-color: {SUCCESS_COLOR}; color: white; padding: 10px 20px; border-radius: 50px; font-size: 14px; font-weight: bold;">
+            ✓ Order Delivered
+        </div>
+    </div>
+""")
+
+_NEW_ORDER_BADGE = _minify(f"""
+    <div style="text-align: center; margin-bottom: 30px;">
+        <div style="display: inline-block; background-color: {SECONDARY_COLOR}; color: white; padding: 10px 20px; border-radius: 50px; font-size: 14px; font-weight: bold;">
+            🔔 New Order Received
+        </div>
+    </div>
+""")
+
+_DELIVERY_ORDER_BADGE = _minify(f"""
+    <div style="text-align: center; margin-bottom: 30px;">
+        <div style="display: inline-block; background-color: {PRIMARY_COLOR}; color: white; padding: 10px 20px; border-radius: 50px; font-size: 14px; font-weight: bold;">
+            📄 Delivery Order
+        </div>
+    </div>
+""")
+
+_CONFIRMATION_ITEMS_HEAD = _minify(f"""
+        <thead>
+            <tr style="background-color: #f9fafb;">
+                <th style="padding: 12px; text-align: left; color: {TEXT_COLOR}; font-size: 14px;">Product</th>
+                <th style="padding: 12px; text-align: center; color: {TEXT_COLOR}; font-size: 14px;">Qty</th>
+                <th style="padding: 12px; text-align: right; color: {TEXT_COLOR}; font-size: 14px;">Price</th>
+                <th style="padding: 12px; text-align: right; color: {TEXT_COLOR}; font-size: 14px;">Total</th>
+            </tr>
+        </thead>
+""")
+
+# Item row templates, filled in with str.format for each line item
+_CONFIRMATION_ROW = _minify("""
+        <tr>
+            <td style="padding: 12px; border-bottom: 1px solid #e5e7eb;">{name}</td>
+            <td style="padding: 12px; border-bottom: 1px solid #e5e7eb; text-align: center;">{quantity}</td>
+            <td style="padding: 12px; border-bottom: 1px solid #e5e7eb; text-align: right;">${unit_price}</td>
+            <td style="padding: 12px; border-bottom: 1px solid #e5e7eb; text-align: right;">${line_total}</td>
+        </tr>
+        """)
+
+_ADMIN_ALERT_ROW = _minify("""
+        <tr>
+            <td style="padding: 10px; border-bottom: 1px solid #e5e7eb;">{name}</td>
+            <td style="padding: 10px; border-bottom: 1px solid #e5e7eb; text-align: center;">{quantity}</td>
+            <td style="padding: 10px; border-bottom: 1px solid #e5e7eb; text-align: right;">${line_total}</td>
+        </tr>
+        """)
+
+_CONFIRMATION_NEXT_STEPS = _minify(f"""
+    <div style="margin-top: 30px; padding: 20px; background-color: #fef3c7; border-radius: 8px; border-left: 4px solid {WARNING_COLOR};">
+        <p style="margin: 0; color: #92400e; font-size: 14px;">
+            <strong>What's Next?</strong><br>
+            We'll send you a Delivery Order (DO) once your order is ready for dispatch. You can track your order status anytime by replying to this email or contacting us on WhatsApp.
+        </p>
+    </div>
+""")
+
+_DELIVERED_HELP = _minify(f"""
+    <div style="background-color: #f0fdf4; padding: 30px; border-radius: 8px; text-align: center;">
+        <p style="margin: 0 0 15px; color: #166534; font-size: 18px; font-weight: bold;">
+            Thank you for choosing UnidBox Hardware!
+        </p>
+        <p style="margin: 0; color: #166534; font-size: 14px;">
+            Your trusted partner for quality hardware supplies.
+        </p>
+    </div>
     
-    # Brand colors
-    PRIMARY_COLOR = "#1e3a5f"  # Navy blue
-    SECONDARY_COLOR = "#f59e0b"  # Amber/Orange
-    SUCCESS_COLOR = "#10b981"  # Green
-    WARNING_COLOR = "#f59e0b"  # Amber
-    ERROR_COLOR = "#ef4444"  # Red
-    BACKGROUND_COLOR = "#f3f4f6"
-    TEXT_COLOR = "#1f2937"
-    
-    @classmethod
-    def base_template(cls, content: str, title: str = "UnidBox Hardware") -> str:
-        """Base HTML template wrapper"""
-        return f"""
+    <div style="margin-top: 30px; padding: 20px; background-color: #f9fafb; border-radius: 8px;">
+        <h3 style="margin: 0 0 15px; color: {PRIMARY_COLOR}; font-size: 16px;">Need Help?</h3>
+        <p style="margin: 0; color: #6b7280; font-size: 14px;">
+            If you have any questions about your order or need assistance with your products, don't hesitate to contact us. We're here to help!
+        </p>
+    </div>
+""")
+
+
+# Slot marker used to split templates into their static parts at import
+_SLOT = "\x00"
+
+
+def _compile(template: str) -> Tuple[str, ...]:
+    """Minify a template and split it on its slot markers into static parts"""
+    return tuple(_minify(template).split(_SLOT))
+
+
+def _escape(value: Any, default: str = "") -> str:
+    """HTML-escape a field for interpolation, substituting a default if empty"""
+    return html.escape(str(value)) if value else default
+
+
+# Base envelope with slots for the title, content and copyright year
+_BASE_HEAD, _BASE_MID, _BASE_FOOT_START, _BASE_FOOT_END = _compile(f"""
 <!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
+    <title>{_SLOT}</title>
 </head>
-<body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: {cls.BACKGROUND_COLOR};">
+<body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: {BACKGROUND_COLOR};">
     <table role="presentation" style="width: 100%; border-collapse: collapse;">
         <tr>
             <td align="center" style="padding: 40px 0;">
                 <table role="presentation" style="width: 600px; max-width: 100%; border-collapse: collapse; background-color: #ffffff; border-radius: 8px; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);">
                     <!-- Header -->
                     <tr>
-                        <td style="background-color: {cls.PRIMARY_COLOR}; padding: 30px; text-align: center; border-radius: 8px 8px 0 0;">
+                        <td style="background-color: {PRIMARY_COLOR}; padding: 30px; text-align: center; border-radius: 8px 8px 0 0;">
                             <h1 style="margin: 0; color: #ffffff; font-size: 28px; font-weight: bold;">
                                 UnidBox Hardware
                             </h1>
@@ -82,7 +224,7 @@ class EmailTemplates:
                     <!-- Content -->
                     <tr>
                         <td style="padding: 40px 30px;">
-                            {content}
+                            {_SLOT}
                         </td>
                     </tr>
                     <!-- Footer -->
@@ -95,7 +237,7 @@ class EmailTemplates:
                                 Hougang | Kovan | MacPherson | Bedok | Tampines
                             </p>
                             <p style="margin: 0; color: #9ca3af; font-size: 12px;">
-                                © {datetime.now().year} UnidBox Hardware. All rights reserved.
+                                © {_SLOT} UnidBox Hardware. All rights reserved.
                             </p>
                         </td>
                     </tr>
@@ -105,312 +247,405 @@ class EmailTemplates:
     </table>
 </body>
 </html>
-"""
+""")
+
+
+# Footer with the year filled in, rebuilt only when the year rolls over
+_footer_html = ""
+_footer_expires = 0.0
+
+
+def _footer() -> str:
+    """Get the footer for the current year"""
+    global _footer_html, _footer_expires
+    if time.time() >= _footer_expires:
+        year = datetime.now().year
+        _footer_html = "".join((_BASE_FOOT_START, str(year), _BASE_FOOT_END))
+        _footer_expires = datetime(year + 1, 1, 1).timestamp()
+        # Every memoized email embeds the old footer
+        clear_cache()
+    return _footer_html
+
+
+# Memoized templates, so a resend of an unchanged order skips rendering
+_memoized_templates = []
+
+
+def _memoize(template):
+    """Cache a template's output by its arguments, which must be hashable"""
+    cached = lru_cache(maxsize=1024)(template)
+    _memoized_templates.append(cached)
     
-    @classmethod
-    def order_confirmation(cls, order: OrderData) -> str:
-        """Order confirmation email template"""
-        items_html = ""
-        for item in order.items:
-            items_html += f"""
-            <tr>
-                <td style="padding: 12px; border-bottom: 1px solid #e5e7eb;">{item.name}</td>
-                <td style="padding: 12px; border-bottom: 1px solid #e5e7eb; text-align: center;">{item.quantity}</td>
-                <td style="padding: 12px; border-bottom: 1px solid #e5e7eb; text-align: right;">${item.unit_price:.2f}</td>
-                <td style="padding: 12px; border-bottom: 1px solid #e5e7eb; text-align: right;">${item.total_price:.2f}</td>
-            </tr>
-            """
-        
-        delivery_section = ""
-        if order.delivery_address:
-            delivery_section = f"""
-            <div style="background-color: #f9fafb; padding: 20px; border-radius: 8px; margin-top: 20px;">
-                <h3 style="margin: 0 0 15px; color: {cls.PRIMARY_COLOR}; font-size: 16px;">📍 Delivery Information</h3>
-                <p style="margin: 0 0 8px; color: {cls.TEXT_COLOR};">
-                    <strong>Address:</strong> {order.delivery_address}
-                </p>
-                {f'<p style="margin: 0; color: {cls.TEXT_COLOR};"><strong>Preferred Date:</strong> {order.delivery_date}</p>' if order.delivery_date else ''}
-            </div>
-            """
-        
-        content = f"""
-        <div style="text-align: center; margin-bottom: 30px;">
-            <div style="display: inline-block; background-color: {cls.SUCCESS_COLOR}; color: white; padding: 10px 20px; border-radius: 50px; font-size: 14px; font-weight: bold;">
-                ✓ Order Confirmed
-            </div>
-        </div>
-        
-        <h2 style="margin: 0 0 10px; color: {cls.TEXT_COLOR}; font-size: 24px;">Thank you for your order!</h2>
-        <p style="margin: 0 0 20px; color: #6b7280; font-size: 16px;">
-            Hi {order.customer_name or 'Valued Customer'},
-        </p>
-        <p style="margin: 0 0 30px; color: #6b7280; font-size: 16px;">
-            We've received your order and it's being processed. Here are your order details:
-        </p>
-        
-        <div style="background-color: {cls.PRIMARY_COLOR}; color: white; padding: 15px 20px; border-radius: 8px 8px 0 0;">
-            <table style="width: 100%;">
-                <tr>
-                    <td>
-                        <strong>Order ID:</strong> {order.order_id}
-                    </td>
-                    <td style="text-align: right;">
-                        <strong>Date:</strong> {order.order_date}
-                    </td>
-                </tr>
-            </table>
-        </div>
-        
-        <table style="width: 100%; border-collapse: collapse; border: 1px solid #e5e7eb; border-top: none;">
-            <thead>
-                <tr style="background-color: #f9fafb;">
-                    <th style="padding: 12px; text-align: left; color: {cls.TEXT_COLOR}; font-size: 14px;">Product</th>
-                    <th style="padding: 12px; text-align: center; color: {cls.TEXT_COLOR}; font-size: 14px;">Qty</th>
-                    <th style="padding: 12px; text-align: right; color: {cls.TEXT_COLOR}; font-size: 14px;">Price</th>
-                    <th style="padding: 12px; text-align: right; color: {cls.TEXT_COLOR}; font-size: 14px;">Total</th>
-                </tr>
-            </thead>
-            <tbody>
-                {items_html}
-            </tbody>
-            <tfoot>
-                <tr>
-                    <td colspan="3" style="padding: 12px; text-align: right; color: #6b7280;">Subtotal</td>
-                    <td style="padding: 12px; text-align: right; color: {cls.TEXT_COLOR};">${order.subtotal:.2f}</td>
-                </tr>
-                <tr>
-                    <td colspan="3" style="padding: 12px; text-align: right; color: #6b7280;">GST (9%)</td>
-                    <td style="padding: 12px; text-align: right; color: {cls.TEXT_COLOR};">${order.tax:.2f}</td>
-                </tr>
-                <tr>
-                    <td colspan="3" style="padding: 12px; text-align: right; color: #6b7280;">Shipping</td>
-                    <td style="padding: 12px; text-align: right; color: {cls.TEXT_COLOR};">${order.shipping:.2f}</td>
-                </tr>
-                <tr style="background-color: {cls.PRIMARY_COLOR};">
-                    <td colspan="3" style="padding: 15px; text-align: right; color: white; font-weight: bold; font-size: 16px;">Total</td>
-                    <td style="padding: 15px; text-align: right; color: white; font-weight: bold; font-size: 18px;">${order.total:.2f} SGD</td>
-                </tr>
-            </tfoot>
-        </table>
-        
-        {delivery_section}
+    @wraps(template)
+    def render(*args, **kwargs):
+        # Cached emails carry the footer year; refreshing the footer on
+        # rollover clears the caches of all memoized templates
+        if time.time() >= _footer_expires:
+            _footer()
+        return cached(*args, **kwargs)
+    
+    return render
+
+
+def clear_cache():
+    """Drop all memoized template output"""
+    for cached in _memoized_templates:
+        cached.cache_clear()
+
+
+def base_template(content: str, title: str = "UnidBox Hardware") -> str:
+    """Base HTML template wrapper"""
+    return "".join((_BASE_HEAD, title, _BASE_MID, content, _footer()))
+
+
+@_memoize
+def order_confirmation(order: OrderData) -> RenderedEmail:
+    """Order confirmation email template"""
+    # Order fields are escaped once here and interpolated as-is below
+    order_id = _escape(order.order_id)
+    customer_name = _escape(order.customer_name, 'Valued Customer')
+    order_date = _escape(order.order_date)
+    
+    # Money fields are formatted once up front and interpolated as strings
+    subtotal = f"{order.subtotal:.2f}"
+    tax = f"{order.tax:.2f}"
+    shipping = f"{order.shipping:.2f}"
+    total = f"{order.total:.2f}"
+    
+    rows = []
+    for item in order.items:
+        rows.append(_CONFIRMATION_ROW.format(
+            name=_escape(item.name),
+            quantity=item.quantity,
+            unit_price=f"{item.unit_price:.2f}",
+            line_total=f"{item.total_price:.2f}"
+        ))
+    items_html = "".join(rows)
+    
+    delivery_section = ""
+    if order.delivery_address:
+        date_line = ""
+        if order.delivery_date:
+            date_line = f'<p style="margin: 0; color: {TEXT_COLOR};"><strong>Preferred Date:</strong> {_escape(order.delivery_date)}</p>'
         
-        <div style="margin-top: 30px; padding: 20px; background-color: #fef3c7; border-radius: 8px; border-left: 4px solid {cls.WARNING_COLOR};">
-            <p style="margin: 0; color: #92400e; font-size: 14px;">
-                <strong>What's Next?</strong><br>
-                We'll send you a Delivery Order (DO) once your order is ready for dispatch. You can track your order status anytime by replying to this email or contacting us on WhatsApp.
+        delivery_section = f"""
+        <div style="background-color: #f9fafb; padding: 20px; border-radius: 8px; margin-top: 20px;">
+            <h3 style="margin: 0 0 15px; color: {PRIMARY_COLOR}; font-size: 16px;">📍 Delivery Information</h3>
+            <p style="margin: 0 0 8px; color: {TEXT_COLOR};">
+                <strong>Address:</strong> {_escape(order.delivery_address)}
             </p>
+            {date_line}
         </div>
         """
-        
-        return cls.base_template(content, f"Order Confirmation - {order.order_id}")
-    
-    @classmethod
-    def order_shipped(cls, order: OrderData, tracking_number: Optional[str] = None) -> str:
-        """Order shipped notification template"""
-        tracking_section = ""
-        if tracking_number:
-            tracking_section = f"""
-            <div style="background-color: #f0fdf4; padding: 20px; border-radius: 8px; margin: 20px 0; text-align: center;">
-                <p style="margin: 0 0 10px; color: #166534; font-size: 14px;">Tracking Number</p>
-                <p style="margin: 0; color: {cls.PRIMARY_COLOR}; font-size: 24px; font-weight: bold; letter-spacing: 2px;">
-                    {tracking_number}
-                </p>
-            </div>
-            """
-        
-        content = f"""
-        <div style="text-align: center; margin-bottom: 30px;">
-            <div style="display: inline-block; background-color: {cls.SECONDARY_COLOR}; color: white; padding: 10px 20px; border-radius: 50px; font-size: 14px; font-weight: bold;">
-                📦 Order Shipped
-            </div>
-        </div>
-        
-        <h2 style="margin: 0 0 10px; color: {cls.TEXT_COLOR}; font-size: 24px;">Your order is on its way!</h2>
-        <p style="margin: 0 0 20px; color: #6b7280; font-size: 16px;">
-            Hi {order.customer_name or 'Valued Customer'},
-        </p>
-        <p style="margin: 0 0 30px; color: #6b7280; font-size: 16px;">
-            Great news! Your order <strong>{order.order_id}</strong> has been shipped and is on its way to you.
-        </p>
-        
-        {tracking_section}
-        
-        <div style="background-color: #f9fafb; padding: 20px; border-radius: 8px;">
-            <h3 style="margin: 0 0 15px; color: {cls.PRIMARY_COLOR}; font-size: 16px;">📍 Delivery Details</h3>
-            <p style="margin: 0 0 8px; color: {cls.TEXT_COLOR};">
-                <strong>Address:</strong> {order.delivery_address or 'To be confirmed'}
-            </p>
-            <p style="margin: 0; color: {cls.TEXT_COLOR};">
-                <strong>Expected Delivery:</strong> {order.delivery_date or 'Within 2-3 business days'}
-            </p>
-        </div>
-        
-        <div style="margin-top: 30px; text-align: center;">
-            <p style="margin: 0; color: #6b7280; font-size: 14px;">
-                Questions about your delivery? Contact us on WhatsApp or reply to this email.
+    
+    content = f"""
+    {_CONFIRMED_BADGE}
+    
+    <h2 style="margin: 0 0 10px; color: {TEXT_COLOR}; font-size: 24px;">Thank you for your order!</h2>
+    <p style="margin: 0 0 20px; color: #6b7280; font-size: 16px;">
+        Hi {customer_name},
+    </p>
+    <p style="margin: 0 0 30px; color: #6b7280; font-size: 16px;">
+        We've received your order and it's being processed. Here are your order details:
+    </p>
+    
+    <div style="background-color: {PRIMARY_COLOR}; color: white; padding: 15px 20px; border-radius: 8px 8px 0 0;">
+        <table style="width: 100%;">
+            <tr>
+                <td>
+                    <strong>Order ID:</strong> {order_id}
+                </td>
+                <td style="text-align: right;">
+                    <strong>Date:</strong> {order_date}
+                </td>
+            </tr>
+        </table>
+    </div>
+    
+    <table style="width: 100%; border-collapse: collapse; border: 1px solid #e5e7eb; border-top: none;">
+        {_CONFIRMATION_ITEMS_HEAD}
+        <tbody>
+            {items_html}
+        </tbody>
+        <tfoot>
+            <tr>
+                <td colspan="3" style="padding: 12px; text-align: right; color: #6b7280;">Subtotal</td>
+                <td style="padding: 12px; text-align: right; color: {TEXT_COLOR};">${subtotal}</td>
+            </tr>
+            <tr>
+                <td colspan="3" style="padding: 12px; text-align: right; color: #6b7280;">GST (9%)</td>
+                <td style="padding: 12px; text-align: right; color: {TEXT_COLOR};">${tax}</td>
+            </tr>
+            <tr>
+                <td colspan="3" style="padding: 12px; text-align: right; color: #6b7280;">Shipping</td>
+                <td style="padding: 12px; text-align: right; color: {TEXT_COLOR};">${shipping}</td>
+            </tr>
+            <tr style="background-color: {PRIMARY_COLOR};">
+                <td colspan="3" style="padding: 15px; text-align: right; color: white; font-weight: bold; font-size: 16px;">Total</td>
+                <td style="padding: 15px; text-align: right; color: white; font-weight: bold; font-size: 18px;">${total} SGD</td>
+            </tr>
+        </tfoot>
+    </table>
+    
+    {delivery_section}
+    
+    {_CONFIRMATION_NEXT_STEPS}
+    """
+    
+    subject = f"Order Confirmed - {order.order_id}"
+    return RenderedEmail(subject, base_template(content, _escape(subject)))
+
+
+@_memoize
+def order_shipped(order: OrderData, tracking_number: Optional[str] = None) -> RenderedEmail:
+    """Order shipped notification template"""
+    order_id = _escape(order.order_id)
+    customer_name = _escape(order.customer_name, 'Valued Customer')
+    
+    tracking_section = ""
+    if tracking_number:
+        tracking_section = f"""
+        <div style="background-color: #f0fdf4; padding: 20px; border-radius: 8px; margin: 20px 0; text-align: center;">
+            <p style="margin: 0 0 10px; color: #166534; font-size: 14px;">Tracking Number</p>
+            <p style="margin: 0; color: {PRIMARY_COLOR}; font-size: 24px; font-weight: bold; letter-spacing: 2px;">
+                {_escape(tracking_number)}
             </p>
         </div>
         """
-        
-        return cls.base_template(content, f"Order Shipped - {order.order_id}")
-    
-    @classmethod
-    def order_delivered(cls, order: OrderData) -> str:
-        """Order delivered notification template"""
-        content = f"""
-        <div style="text-align: center; margin-bottom: 30px;">
-            <div style="display: inline-block; background-color: {cls.SUCCESS_COLOR}; color: white; padding: 10px 20px; border-radius: 50px; font-size: 14px; font-weight: bold;">
-                ✓ Order Delivered
-            </div>
-        </div>
-        
-        <h2 style="margin: 0 0 10px; color: {cls.TEXT_COLOR}; font-size: 24px;">Your order has been delivered!</h2>
-        <p style="margin: 0 0 20px; color: #6b7280; font-size: 16px;">
-            Hi {order.customer_name or 'Valued Customer'},
+    
+    content = f"""
+    {_SHIPPED_BADGE}
+    
+    <h2 style="margin: 0 0 10px; color: {TEXT_COLOR}; font-size: 24px;">Your order is on its way!</h2>
+    <p style="margin: 0 0 20px; color: #6b7280; font-size: 16px;">
+        Hi {customer_name},
+    </p>
+    <p style="margin: 0 0 30px; color: #6b7280; font-size: 16px;">
+        Great news! Your order <strong>{order_id}</strong> has been shipped and is on its way to you.
+    </p>
+    
+    {tracking_section}
+    
+    <div style="background-color: #f9fafb; padding: 20px; border-radius: 8px;">
+        <h3 style="margin: 0 0 15px; color: {PRIMARY_COLOR}; font-size: 16px;">📍 Delivery Details</h3>
+        <p style="margin: 0 0 8px; color: {TEXT_COLOR};">
+            <strong>Address:</strong> {_escape(order.delivery_address, 'To be confirmed')}
         </p>
-        <p style="margin: 0 0 30px; color: #6b7280; font-size: 16px;">
-            Your order <strong>{order.order_id}</strong> has been successfully delivered. We hope you're satisfied with your purchase!
+        <p style="margin: 0; color: {TEXT_COLOR};">
+            <strong>Expected Delivery:</strong> {_escape(order.delivery_date, 'Within 2-3 business days')}
         </p>
-        
-        <div style="background-color: #f0fdf4; padding: 30px; border-radius: 8px; text-align: center;">
-            <p style="margin: 0 0 15px; color: #166534; font-size: 18px; font-weight: bold;">
-                Thank you for choosing UnidBox Hardware!
-            </p>
-            <p style="margin: 0; color: #166534; font-size: 14px;">
-                Your trusted partner for quality hardware supplies.
-            </p>
-        </div>
-        
-        <div style="margin-top: 30px; padding: 20px; background-color: #f9fafb; border-radius: 8px;">
-            <h3 style="margin: 0 0 15px; color: {cls.PRIMARY_COLOR}; font-size: 16px;">Need Help?</h3>
-            <p style="margin: 0; color: #6b7280; font-size: 14px;">
-                If you have any questions about your order or need assistance with your products, don't hesitate to contact us. We're here to help!
-            </p>
-        </div>
-        """
-        
-        return cls.base_template(content, f"Order Delivered - {order.order_id}")
-    
-    @classmethod
-    def new_order_admin_alert(cls, order: OrderData) -> str:
-        """Admin notification for new order"""
-        items_html = ""
-        for item in order.items:
-            items_html += f"""
+    </div>
+    
+    <div style="margin-top: 30px; text-align: center;">
+        <p style="margin: 0; color: #6b7280; font-size: 14px;">
+            Questions about your delivery? Contact us on WhatsApp or reply to this email.
+        </p>
+    </div>
+    """
+    
+    subject = f"Your Order is On Its Way! - {order.order_id}"
+    return RenderedEmail(subject, base_template(content, _escape(subject)))
+
+
+@_memoize
+def order_delivered(order: OrderData) -> RenderedEmail:
+    """Order delivered notification template"""
+    order_id = _escape(order.order_id)
+    customer_name = _escape(order.customer_name, 'Valued Customer')
+    
+    content = f"""
+    {_DELIVERED_BADGE}
+    
+    <h2 style="margin: 0 0 10px; color: {TEXT_COLOR}; font-size: 24px;">Your order has been delivered!</h2>
+    <p style="margin: 0 0 20px; color: #6b7280; font-size: 16px;">
+        Hi {customer_name},
+    </p>
+    <p style="margin: 0 0 30px; color: #6b7280; font-size: 16px;">
+        Your order <strong>{order_id}</strong> has been successfully delivered. We hope you're satisfied with your purchase!
+    </p>
+    
+    {_DELIVERED_HELP}
+    """
+    
+    subject = f"Order Delivered - {order.order_id}"
+    return RenderedEmail(subject, base_template(content, _escape(subject)))
+
+
+@_memoize
+def new_order_admin_alert(order: OrderData) -> RenderedEmail:
+    """Admin notification for new order"""
+    order_id = _escape(order.order_id)
+    total = f"{order.total:.2f}"
+    
+    # Each section goes straight into one buffer that is joined once,
+    # instead of building the item rows and content as separate strings
+    subject = f"🔔 New Order - {order.order_id} (${total})"
+    buf = [_BASE_HEAD, _escape(subject), _BASE_MID]
+    buf.append(f"""
+    {_NEW_ORDER_BADGE}
+    
+    <h2 style="margin: 0 0 20px; color: {TEXT_COLOR}; font-size: 24px;">New Order Alert</h2>
+    
+    <div style="background-color: #fef3c7; padding: 20px; border-radius: 8px; margin-bottom: 20px;">
+        <table style="width: 100%;">
             <tr>
-                <td style="padding: 10px; border-bottom: 1px solid #e5e7eb;">{item.name}</td>
-                <td style="padding: 10px; border-bottom: 1px solid #e5e7eb; text-align: center;">{item.quantity}</td>
-                <td style="padding: 10px; border-bottom: 1px solid #e5e7eb; text-align: right;">${item.total_price:.2f}</td>
+                <td style="color: #92400e;">
+                    <strong>Order ID:</strong> {order_id}
+                </td>
+                <td style="text-align: right; color: #92400e;">
+                    <strong>Total:</strong> ${total} SGD
+                </td>
             </tr>
-            """
-        
-        content = f"""
-        <div style="text-align: center; margin-bottom: 30px;">
-            <div style="display: inline-block; background-color: {cls.SECONDARY_COLOR}; color: white; padding: 10px 20px; border-radius: 50px; font-size: 14px; font-weight: bold;">
-                🔔 New Order Received
-            </div>
-        </div>
-        
-        <h2 style="margin: 0 0 20px; color: {cls.TEXT_COLOR}; font-size: 24px;">New Order Alert</h2>
-        
-        <div style="background-color: #fef3c7; padding: 20px; border-radius: 8px; margin-bottom: 20px;">
-            <table style="width: 100%;">
-                <tr>
-                    <td style="color: #92400e;">
-                        <strong>Order ID:</strong> {order.order_id}
-                    </td>
-                    <td style="text-align: right; color: #92400e;">
-                        <strong>Total:</strong> ${order.total:.2f} SGD
-                    </td>
-                </tr>
-            </table>
-        </div>
-        
-        <h3 style="margin: 0 0 15px; color: {cls.PRIMARY_COLOR}; font-size: 16px;">Customer Details</h3>
-        <table style="width: 100%; margin-bottom: 20px;">
-            <tr>
-                <td style="padding: 8px 0; color: #6b7280;">Name:</td>
-                <td style="padding: 8px 0; color: {cls.TEXT_COLOR};">{order.customer_name or 'Not provided'}</td>
+        </table>
+    </div>
+    
+    <h3 style="margin: 0 0 15px; color: {PRIMARY_COLOR}; font-size: 16px;">Customer Details</h3>
+    <table style="width: 100%; margin-bottom: 20px;">
+        <tr>
+            <td style="padding: 8px 0; color: #6b7280;">Name:</td>
+            <td style="padding: 8px 0; color: {TEXT_COLOR};">{_escape(order.customer_name, 'Not provided')}</td>
+        </tr>
+        <tr>
+            <td style="padding: 8px 0; color: #6b7280;">Email:</td>
+            <td style="padding: 8px 0; color: {TEXT_COLOR};">{_escape(order.customer_email, 'Not provided')}</td>
+        </tr>
+        <tr>
+            <td style="padding: 8px 0; color: #6b7280;">Phone:</td>
+            <td style="padding: 8px 0; color: {TEXT_COLOR};">{_escape(order.customer_phone, 'Not provided')}</td>
+        </tr>
+        <tr>
+            <td style="padding: 8px 0; color: #6b7280;">Delivery:</td>
+            <td style="padding: 8px 0; color: {TEXT_COLOR};">{_escape(order.delivery_address, 'Not provided')}</td>
+        </tr>
+    </table>
+    
+    <h3 style="margin: 0 0 15px; color: {PRIMARY_COLOR}; font-size: 16px;">Order Items</h3>
+    <table style="width: 100%; border-collapse: collapse; border: 1px solid #e5e7eb;">
+        <thead>
+            <tr style="background-color: #f9fafb;">
+                <th style="padding: 10px; text-align: left;">Product</th>
+                <th style="padding: 10px; text-align: center;">Qty</th>
+                <th style="padding: 10px; text-align: right;">Total</th>
             </tr>
+        </thead>
+        <tbody>
+""")
+    
+    for item in order.items:
+        buf.append(_ADMIN_ALERT_ROW.format(
+            name=_escape(item.name),
+            quantity=item.quantity,
+            line_total=f"{item.total_price:.2f}"
+        ))
+    
+    buf.append("""
+        </tbody>
+    </table>
+    
+    <div style="margin-top: 30px; text-align: center;">
+        <p style="margin: 0; color: #6b7280; font-size: 14px;">
+            Please process this order and generate the Delivery Order.
+        </p>
+    </div>
+""")
+    buf.append(_footer())
+    
+    return RenderedEmail(subject, "".join(buf))
+
+
+@_memoize
+def delivery_order_attached(order: OrderData) -> RenderedEmail:
+    """Delivery Order email with DO attached"""
+    order_id = _escape(order.order_id)
+    customer_name = _escape(order.customer_name, 'Valued Customer')
+    
+    content = f"""
+    {_DELIVERY_ORDER_BADGE}
+    
+    <h2 style="margin: 0 0 10px; color: {TEXT_COLOR}; font-size: 24px;">Your Delivery Order is Ready</h2>
+    <p style="margin: 0 0 20px; color: #6b7280; font-size: 16px;">
+        Hi {customer_name},
+    </p>
+    <p style="margin: 0 0 30px; color: #6b7280; font-size: 16px;">
+        Please find attached the Delivery Order (DO) for your order <strong>{order_id}</strong>.
+    </p>
+    
+    <div style="background-color: #f9fafb; padding: 20px; border-radius: 8px; margin-bottom: 20px;">
+        <table style="width: 100%;">
             <tr>
-                <td style="padding: 8px 0; color: #6b7280;">Email:</td>
-                <td style="padding: 8px 0; color: {cls.TEXT_COLOR};">{order.customer_email or 'Not provided'}</td>
+                <td style="color: #6b7280;">Order ID:</td>
+                <td style="color: {TEXT_COLOR}; font-weight: bold;">{order_id}</td>
             </tr>
             <tr>
-                <td style="padding: 8px 0; color: #6b7280;">Phone:</td>
-                <td style="padding: 8px 0; color: {cls.TEXT_COLOR};">{order.customer_phone or 'Not provided'}</td>
+                <td style="color: #6b7280;">Order Date:</td>
+                <td style="color: {TEXT_COLOR};">{_escape(order.order_date)}</td>
             </tr>
             <tr>
-                <td style="padding: 8px 0; color: #6b7280;">Delivery:</td>
-                <td style="padding: 8px 0; color: {cls.TEXT_COLOR};">{order.delivery_address or 'Not provided'}</td>
+                <td style="color: #6b7280;">Total Amount:</td>
+                <td style="color: {TEXT_COLOR}; font-weight: bold;">${order.total:.2f} SGD</td>
             </tr>
         </table>
-        
-        <h3 style="margin: 0 0 15px; color: {cls.PRIMARY_COLOR}; font-size: 16px;">Order Items</h3>
-        <table style="width: 100%; border-collapse: collapse; border: 1px solid #e5e7eb;">
-            <thead>
-                <tr style="background-color: #f9fafb;">
-                    <th style="padding: 10px; text-align: left;">Product</th>
-                    <th style="padding: 10px; text-align: center;">Qty</th>
-                    <th style="padding: 10px; text-align: right;">Total</th>
-                </tr>
-            </thead>
-            <tbody>
-                {items_html}
-            </tbody>
-        </table>
-        
-        <div style="margin-top: 30px; text-align: center;">
-            <p style="margin: 0; color: #6b7280; font-size: 14px;">
-                Please process this order and generate the Delivery Order.
-            </p>
-        </div>
-        """
-        
-        return cls.base_template(content, f"New Order - {order.order_id}")
-    
-    @classmethod
-    def delivery_order_attached(cls, order: OrderData) -> str:
-        """Delivery Order email with DO attached"""
-        content = f"""
-        <div style="text-align: center; margin-bottom: 30px;">
-            <div style="display: inline-block; background-color: {cls.PRIMARY_COLOR}; color: white; padding: 10px 20px; border-radius: 50px; font-size: 14px; font-weight: bold;">
-                📄 Delivery Order
-            </div>
-        </div>
-        
-        <h2 style="margin: 0 0 10px; color: {cls.TEXT_COLOR}; font-size: 24px;">Your Delivery Order is Ready</h2>
-        <p style="margin: 0 0 20px; color: #6b7280; font-size: 16px;">
-            Hi {order.customer_name or 'Valued Customer'},
-        </p>
-        <p style="margin: 0 0 30px; color: #6b7280; font-size: 16px;">
-            Please find attached the Delivery Order (DO) for your order <strong>{order.order_id}</strong>.
+    </div>
+    
+    <div style="background-color: #dbeafe; padding: 20px; border-radius: 8px; border-left: 4px solid #3b82f6;">
+        <p style="margin: 0; color: #1e40af; font-size: 14px;">
+            <strong>📎 Attachment:</strong> Delivery Order PDF<br><br>
+            Please keep this document for your records. Present it upon delivery for verification.
         </p>
+    </div>
+    """
+    
+    subject = f"Delivery Order - {order.order_id}"
+    return RenderedEmail(subject, base_template(content, _escape(subject)))
+
+
+
+def render_many(
+    orders: Sequence[OrderData],
+    template: Callable[..., RenderedEmail] = order_confirmation,
+    *args: Any
+) -> List[RenderedEmail]:
+    """
+    Render one template for a batch of orders.
+    
+    Every render shares the precompiled envelope parts, so a batch only
+    allocates the per-order strings. Extra positional arguments are passed
+    through to the template after the order.
+    
+    Args:
+        orders: Orders to render
+        template: Template function, e.g. order_shipped
         
-        <div style="background-color: #f9fafb; padding: 20px; border-radius: 8px; margin-bottom: 20px;">
-            <table style="width: 100%;">
-                <tr>
-                    <td style="color: #6b7280;">Order ID:</td>
-                    <td style="color: {cls.TEXT_COLOR}; font-weight: bold;">{order.order_id}</td>
-                </tr>
-                <tr>
-                    <td style="color: #6b7280;">Order Date:</td>
-                    <td style="color: {cls.TEXT_COLOR};">{order.order_date}</td>
-                </tr>
-                <tr>
-                    <td style="color: #6b7280;">Total Amount:</td>
-                    <td style="color: {cls.TEXT_COLOR}; font-weight: bold;">${order.total:.2f} SGD</td>
-                </tr>
-            </table>
-        </div>
-        
-        <div style="background-color: #dbeafe; padding: 20px; border-radius: 8px; border-left: 4px solid #3b82f6;">
-            <p style="margin: 0; color: #1e40af; font-size: 14px;">
-                <strong>📎 Attachment:</strong> Delivery Order PDF<br><br>
-                Please keep this document for your records. Present it upon delivery for verification.
-            </p>
-        </div>
-        """
-        
-        return cls.base_template(content, f"Delivery Order - {order.order_id}")
+    Returns:
+        Rendered email for each order, in input order
+    """
+    return [template(order, *args) for order in orders]
+
+
+class EmailTemplates:
+    """
+    HTML email templates for UnidBox notifications.
+    
+    All templates use inline CSS for maximum email client compatibility.
+    The templates are module-level functions; this class keeps the
+    original EmailTemplates.<name>() interface working.
+    """
+    
+    # Brand colors
+    BRAND_COLORS = BRAND_COLORS
+    PRIMARY_COLOR = PRIMARY_COLOR
+    SECONDARY_COLOR = SECONDARY_COLOR
+    SUCCESS_COLOR = SUCCESS_COLOR
+    WARNING_COLOR = WARNING_COLOR
+    ERROR_COLOR = ERROR_COLOR
+    BACKGROUND_COLOR = BACKGROUND_COLOR
+    TEXT_COLOR = TEXT_COLOR
+    
+    base_template = staticmethod(base_template)
+    order_confirmation = staticmethod(order_confirmation)
+    order_shipped = staticmethod(order_shipped)
+    order_delivered = staticmethod(order_delivered)
+    new_order_admin_alert = staticmethod(new_order_admin_alert)
+    delivery_order_attached = staticmethod(delivery_order_attached)
+    render_many = staticmethod(render_many)
+    clear_cache = staticmethod(clear_cache)
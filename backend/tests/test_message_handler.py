@@ -0,0 +1,77 @@
+"""
+Tests for the WhatsApp message handler's confirmation step
+"""
+
+import os
+import sys
+import asyncio
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from whatsapp.message_handler import (
+    MessageHandler,
+    ConversationState,
+    ConfirmationAction,
+)
+
+
+class MatchConfirmationTest(unittest.TestCase):
+    """Free-form replies at the confirmation step"""
+    
+    def setUp(self):
+        self.handler = MessageHandler()
+    
+    def assertMatches(self, message, expected):
+        self.assertIs(self.handler._match_confirmation(message), expected, message)
+    
+    def test_leading_keyword(self):
+        self.assertMatches("yes please", ConfirmationAction.CONFIRM)
+        self.assertMatches("proceed with the order please", ConfirmationAction.CONFIRM)
+        self.assertMatches("cancel it", ConfirmationAction.CANCEL)
+        self.assertMatches("modify quantity", ConfirmationAction.MODIFY)
+    
+    def test_short_reply(self):
+        self.assertMatches("ok confirm", ConfirmationAction.CONFIRM)
+        self.assertMatches("please proceed", ConfirmationAction.CONFIRM)
+    
+    def test_negated_reply(self):
+        self.assertMatches("don't proceed", None)
+        self.assertMatches("please do not confirm yet", None)
+        self.assertMatches("yes but not yet", None)
+    
+    def test_question(self):
+        self.assertMatches("can you confirm the price first?", None)
+        self.assertMatches("wait, is delivery free? then proceed", None)
+    
+    def test_destructive_keyword(self):
+        self.assertMatches("i want to cancel", None)
+        self.assertMatches("no problem, confirm", None)
+    
+    def test_long_reply_without_leading_keyword(self):
+        self.assertMatches("i would like to confirm the order now", None)
+
+
+class HandleConfirmationTest(unittest.TestCase):
+    """Replies that must not place the order"""
+    
+    def test_ambiguous_reply_asks_again(self):
+        handler = MessageHandler()
+        for message in [
+            "don't proceed",
+            "please do not confirm yet",
+            "can you confirm the price first?",
+            "wait, is delivery free? then proceed",
+        ]:
+            context = handler._get_or_create_context("6590000000")
+            context.state = ConversationState.AWAITING_CONFIRMATION
+            context.extracted_order = {"delivery": {"address": "Blk 1 Hougang"}}
+            
+            result = asyncio.run(handler.process_message("6590000000", message))
+            
+            self.assertEqual(result["action"], "send_interactive", message)
+            self.assertEqual(context.state, ConversationState.AWAITING_CONFIRMATION, message)
+
+
+if __name__ == "__main__":
+    unittest.main()
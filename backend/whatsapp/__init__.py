@@ -1,8 +1,29 @@
 # WhatsApp Integration Module for UnidBox Order Copilot
 # This module handles WhatsApp Business API integration for dealer communication
+#
+# Submodules are imported on first attribute access (PEP 562), so importing
+# the package does not pull in the HTTP client and handler dependencies.
+
+import importlib
+
+_LAZY_IMPORTS = {
+    'WhatsAppClient': 'whatsapp_client',
+    'MessageHandler': 'message_handler',
+    'WebhookHandler': 'webhook_handler',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(f'.{_LAZY_IMPORTS[name]}', __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
 
-from .whatsapp_client import WhatsAppClient
-from .message_handler import MessageHandler
-from .webhook_handler import WebhookHandler
 
 __all__ = ['WhatsAppClient', 'MessageHandler', 'WebhookHandler']
@@ -5,21 +5,131 @@ This module handles incoming WhatsApp messages, processes them through
 the AI intent parser, and orchestrates the order flow.
 """
 
-import json
-from typing import Optional, Dict, Any, List, Callable
-from dataclasses import dataclass
+import re
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict, deque
+from functools import cached_property
+from typing import Optional, Dict, Any, List, Callable, Tuple, Deque
+from dataclasses import dataclass, field, replace
 from datetime import datetime
 from enum import Enum
 
-# Import AI modules (relative imports for package structure)
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
+# AI modules are a sibling top-level package: whatever put `whatsapp` on
+# sys.path (the backend directory) makes `ai` importable too
 from ai.intent_parser import IntentParser, ParsedIntent, IntentType
 from ai.product_matcher import ProductMatcher, MatchResult
 from ai.order_extractor import OrderExtractor, ExtractedOrder
 
+logger = logging.getLogger(__name__)
+
+
+# Reply text and buttons are built once at import; only the dynamic
+# replies are formatted per message.
+_REPLY_WELCOME = (
+    "Hi! I'm the UnidBox Order Copilot. I can help you with:\n\n"
+    "• Placing orders for hardware supplies\n"
+    "• Checking product prices and availability\n"
+    "• Tracking your order status\n\n"
+    "Just tell me what you need! For example:\n"
+    "_'I need 10 Acorn ceiling fans for a condo project'_"
+)
+_REPLY_ORDER_STATUS = (
+    "To check your order status, please provide your order number.\n\n"
+    "Example: _UB-20260131-ABC123_"
+)
+_REPLY_ORDER_SUMMARY = "📋 *Order Summary*\n\n{summary}\n\n{notes}"
+_REPLY_PROCEED = "Would you like to proceed with this order?"
+_REPLY_PRODUCT_SELECTED = "Great choice! *{name}* - ${price:.2f}\n\nHow many units do you need?"
+_REPLY_PRODUCTS_FOUND = "Found {total} products matching '{query}':"
+_REPLY_NO_PRODUCTS = (
+    "Sorry, I couldn't find any products matching '{query}'. "
+    "Please try a different search term or browse our catalog."
+)
+_REPLY_QUANTITY_ADDED = (
+    "Added {quantity} units to your order.\n\n"
+    "Would you like to add more items or proceed to checkout?"
+)
+_REPLY_INVALID_QUANTITY = (
+    "Please enter a valid quantity (a positive number).\n\n"
+    "Example: _10_"
+)
+_REPLY_DELIVERY_DETAILS = (
+    "Great! Please provide your delivery details:\n\n"
+    "📍 Delivery address\n"
+    "📅 Preferred delivery date\n"
+    "📱 Contact number\n\n"
+    "Example: _123 Hougang Ave 1, #01-01, Singapore 530123. "
+    "Delivery next Monday. Contact: 91234567_"
+)
+_REPLY_ORDER_CONFIRMED = (
+    "✅ *Order Confirmed!*\n\n"
+    "Order ID: *{order_id}*\n\n"
+    "We'll process your order and send you a Delivery Order (DO) shortly.\n\n"
+    "Thank you for ordering with UnidBox Hardware! 🙏"
+)
+_REPLY_MODIFY = (
+    "No problem! What would you like to change?\n\n"
+    "You can:\n"
+    "• Add more products\n"
+    "• Change quantities\n"
+    "• Remove items\n\n"
+    "Just tell me what you need!"
+)
+_REPLY_CANCELLED = (
+    "Order cancelled. No worries!\n\n"
+    "Feel free to start a new order anytime. Just tell me what you need! 😊"
+)
+_REPLY_ADD_MORE = (
+    "Sure! What else would you like to add?\n\n"
+    "Tell me the product name or search for items."
+)
+_REPLY_CHECKOUT = (
+    "Please provide your delivery details:\n\n"
+    "📍 Delivery address\n"
+    "📅 Preferred delivery date\n"
+    "📱 Contact number"
+)
+_REPLY_SELECT_OPTION = "Please select an option:"
+_REPLY_FINAL_SUMMARY = (
+    "📋 *Final Order Summary*\n\n{summary}\n\n"
+    "📍 Delivery: {delivery}\n\n"
+    "Ready to confirm?"
+)
+
+_ORDER_BUTTONS = (
+    {"id": "confirm_order", "title": "Confirm Order"},
+    {"id": "modify_order", "title": "Modify Order"},
+    {"id": "cancel_order", "title": "Cancel"},
+)
+_FINAL_ORDER_BUTTONS = (
+    {"id": "confirm_order", "title": "Confirm Order"},
+    {"id": "modify_order", "title": "Modify"},
+    {"id": "cancel_order", "title": "Cancel"},
+)
+_ADD_MORE_BUTTONS = (
+    {"id": "add_more", "title": "Add More Items"},
+    {"id": "checkout", "title": "Checkout"},
+    {"id": "cancel_order", "title": "Cancel"},
+)
+
+
+# Timestamps are refreshed at most every 50ms; bursts of messages within
+# that window share one ISO string.
+_NOW_ISO_INTERVAL = 0.05
+_now_cache: Tuple[float, str] = (float('-inf'), "")
+
+
+def _now_iso() -> str:
+    """Current UTC time as an ISO string, cached for _NOW_ISO_INTERVAL"""
+    global _now_cache
+    now = time.monotonic()
+    if now - _now_cache[0] > _NOW_ISO_INTERVAL:
+        _now_cache = (now, datetime.utcnow().isoformat())
+    return _now_cache[1]
+
 
 class ConversationState(Enum):
     """States in the order conversation flow"""
@@ -34,7 +144,16 @@ class ConversationState(Enum):
     COMPLETED = "completed"
 
 
-@dataclass
+class ConfirmationAction(Enum):
+    """Replies recognised while awaiting order confirmation"""
+    CONFIRM = "confirm"
+    MODIFY = "modify"
+    CANCEL = "cancel"
+    ADD_MORE = "add_more"
+    CHECKOUT = "checkout"
+
+
+@dataclass(slots=True)
 class ConversationContext:
     """Context for an ongoing conversation with a dealer"""
     phone_number: str
@@ -45,11 +164,81 @@ class ConversationContext:
     pending_items: Optional[List[Dict]] = None
     current_item_index: int = 0
     last_message_at: Optional[str] = None
-    created_at: str = None
+    created_at: str = field(default_factory=_now_iso)
+
+
+class ConversationStore:
+    """
+    Bounded store for conversation contexts.
+    
+    Contexts idle for longer than ``ttl`` seconds expire, and the least
+    recently used context is evicted once ``max_size`` is reached.
+    """
+    
+    def __init__(self, max_size: int = 10000, ttl: float = 86400):
+        """
+        Initialize the store.
+        
+        Args:
+            max_size: Maximum number of conversations kept
+            ttl: Seconds of inactivity before a conversation expires
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: OrderedDict[str, Tuple[float, ConversationContext]] = OrderedDict()
+    
+    def get(self, phone_number: str) -> Optional[ConversationContext]:
+        """Get a conversation context, or None if missing or expired"""
+        entry = self._items.get(phone_number)
+        if entry is None:
+            return None
+        
+        expires_at, context = entry
+        if expires_at <= time.monotonic():
+            del self._items[phone_number]
+            return None
+        
+        self._items[phone_number] = (time.monotonic() + self.ttl, context)
+        self._items.move_to_end(phone_number)
+        return context
+    
+    def set(self, phone_number: str, context: ConversationContext):
+        """Store a conversation context, evicting the oldest if full"""
+        self._items[phone_number] = (time.monotonic() + self.ttl, context)
+        self._items.move_to_end(phone_number)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+    
+    def delete(self, phone_number: str):
+        """Remove a conversation context"""
+        self._items.pop(phone_number, None)
+    
+    def purge_expired(self) -> int:
+        """
+        Remove all expired conversations.
+        
+        Entries are kept in access order, so their expiry times are
+        ascending and the sweep stops at the first live entry instead of
+        scanning the whole store.
+        
+        Returns:
+            Number of conversations removed
+        """
+        now = time.monotonic()
+        removed = 0
+        while self._items:
+            phone_number, (expires_at, _) = next(iter(self._items.items()))
+            if expires_at > now:
+                break
+            del self._items[phone_number]
+            removed += 1
+        return removed
     
-    def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.utcnow().isoformat()
+    def __contains__(self, phone_number: str) -> bool:
+        return self.get(phone_number) is not None
+    
+    def __len__(self) -> int:
+        return len(self._items)
 
 
 class MessageHandler:
@@ -60,12 +249,50 @@ class MessageHandler:
     to order confirmation, using the AI modules for parsing and matching.
     """
     
+    # Button IDs and keywords accepted at the confirmation step
+    CONFIRMATION_KEYWORDS = {
+        "confirm_order": ConfirmationAction.CONFIRM,
+        "yes": ConfirmationAction.CONFIRM,
+        "confirm": ConfirmationAction.CONFIRM,
+        "proceed": ConfirmationAction.CONFIRM,
+        "modify_order": ConfirmationAction.MODIFY,
+        "modify": ConfirmationAction.MODIFY,
+        "change": ConfirmationAction.MODIFY,
+        "cancel_order": ConfirmationAction.CANCEL,
+        "cancel": ConfirmationAction.CANCEL,
+        "no": ConfirmationAction.CANCEL,
+        "add_more": ConfirmationAction.ADD_MORE,
+        "checkout": ConfirmationAction.CHECKOUT,
+    }
+    
+    # Finds keywords in a free-form reply such as "yes please"
+    CONFIRMATION_PATTERN = re.compile(
+        r"\b(?:" + "|".join(sorted(map(re.escape, CONFIRMATION_KEYWORDS), key=len, reverse=True)) + r")\b"
+    )
+    
+    # Actions that discard or reopen the order; in free-form replies these
+    # only count as the leading word, and never alongside a positive keyword
+    DESTRUCTIVE_ACTIONS = frozenset({ConfirmationAction.CANCEL, ConfirmationAction.MODIFY})
+    
+    # Negations that turn "confirm" into "don't confirm"
+    NEGATION_PATTERN = re.compile(r"\b(?:no|not|never|dont|cannot)\b|n['’]t\b")
+    
+    # Longest free-form reply in which a positive keyword counts when it is
+    # not the leading word ("ok confirm", "please proceed")
+    MAX_FREE_FORM_WORDS = 3
+    
+    # Longest quantity reply accepted (up to 999,999 units)
+    MAX_QUANTITY_DIGITS = 6
+    
     def __init__(
         self,
         intent_parser: Optional[IntentParser] = None,
         product_matcher: Optional[ProductMatcher] = None,
         order_extractor: Optional[OrderExtractor] = None,
-        catalog_path: Optional[str] = None
+        catalog_path: Optional[str] = None,
+        num_workers: int = 4,
+        parse_cache_size: int = 1024,
+        parse_cache_ttl: float = 3600
     ):
         """
         Initialize the message handler.
@@ -75,18 +302,69 @@ class MessageHandler:
             product_matcher: ProductMatcher instance
             order_extractor: OrderExtractor instance
             catalog_path: Path to product catalog JSON
+            num_workers: Number of background workers processing queued messages
+            parse_cache_size: Maximum number of cached intent parses
+            parse_cache_ttl: Seconds a cached intent parse stays valid
         """
-        self.intent_parser = intent_parser or IntentParser()
-        self.product_matcher = product_matcher or ProductMatcher(catalog_path)
-        self.order_extractor = order_extractor or OrderExtractor()
+        # AI modules that are not passed in are created on first use
+        self.catalog_path = catalog_path
+        if intent_parser:
+            self.intent_parser = intent_parser
+        if product_matcher:
+            self.product_matcher = product_matcher
+        if order_extractor:
+            self.order_extractor = order_extractor
+        
+        # LRU cache of parsed intents keyed by normalized message hash
+        self.parse_cache_size = parse_cache_size
+        self.parse_cache_ttl = parse_cache_ttl
+        self._parse_cache: OrderedDict[bytes, Tuple[float, ParsedIntent]] = OrderedDict()
         
         # In-memory conversation storage (replace with database in production)
-        self.conversations: Dict[str, ConversationContext] = {}
+        self.conversations = ConversationStore()
         
         # Callbacks for sending messages
         self._send_text_callback: Optional[Callable] = None
         self._send_interactive_callback: Optional[Callable] = None
         self._send_products_callback: Optional[Callable] = None
+        
+        # Incoming messages are queued and processed off the webhook path.
+        # Workers are started on first use since __init__ may run outside
+        # an event loop.
+        self.num_workers = num_workers
+        self._work_queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        # Messages waiting for a sender whose earlier message is being
+        # processed; a sender has an entry only while a worker is on it
+        self._backlogs: Dict[str, Deque[Tuple[str, str]]] = {}
+        
+        # Limits catalog matches running in worker threads at once
+        self._match_semaphore = asyncio.Semaphore(8)
+        
+        # Conversation state -> handler for the next message
+        self._state_handlers: Dict[ConversationState, Callable] = {
+            ConversationState.IDLE: self._handle_new_inquiry,
+            ConversationState.AWAITING_INQUIRY: self._handle_new_inquiry,
+            ConversationState.AWAITING_PRODUCT_SELECTION: self._handle_product_selection,
+            ConversationState.AWAITING_QUANTITY: self._handle_quantity_input,
+            ConversationState.AWAITING_CONFIRMATION: self._handle_confirmation,
+            ConversationState.AWAITING_DELIVERY_INFO: self._handle_delivery_info,
+        }
+    
+    @cached_property
+    def intent_parser(self) -> IntentParser:
+        """Intent parser, created on first use"""
+        return IntentParser()
+    
+    @cached_property
+    def product_matcher(self) -> ProductMatcher:
+        """Product matcher, created (and the catalog loaded) on first use"""
+        return ProductMatcher(self.catalog_path)
+    
+    @cached_property
+    def order_extractor(self) -> OrderExtractor:
+        """Order extractor, created on first use"""
+        return OrderExtractor()
     
     def set_send_callbacks(
         self,
@@ -106,7 +384,32 @@ class MessageHandler:
         message_type: str = "text"
     ) -> Dict[str, Any]:
         """
-        Handle an incoming WhatsApp message.
+        Queue an incoming WhatsApp message and acknowledge it immediately.
+        
+        The AI pipeline runs in a background worker, which delivers the
+        reply through the send callbacks. This keeps the webhook response
+        well within WhatsApp's acknowledgement deadline.
+        
+        Args:
+            phone_number: Sender's phone number
+            message_text: Message content
+            message_type: Type of message (text, interactive, etc.)
+            
+        Returns:
+            Acknowledgement dictionary
+        """
+        self._ensure_workers()
+        await self._work_queue.put((phone_number, message_text, message_type))
+        return {"action": "ack"}
+    
+    async def process_message(
+        self,
+        phone_number: str,
+        message_text: str,
+        message_type: str = "text"
+    ) -> Dict[str, Any]:
+        """
+        Process a message inline and return the reply.
         
         Args:
             phone_number: Sender's phone number
@@ -118,27 +421,112 @@ class MessageHandler:
         """
         # Get or create conversation context
         context = self._get_or_create_context(phone_number)
-        context.last_message_at = datetime.utcnow().isoformat()
+        context.last_message_at = _now_iso()
         
-        # Route based on conversation state
-        if context.state == ConversationState.IDLE or context.state == ConversationState.AWAITING_INQUIRY:
-            return await self._handle_new_inquiry(context, message_text)
+        # Route based on conversation state; anything else is a new inquiry
+        handler = self._state_handlers.get(context.state, self._handle_new_inquiry)
+        return await handler(context, message_text)
+    
+    def _ensure_workers(self):
+        """Start the background workers if they are not running"""
+        self._workers = [task for task in self._workers if not task.done()]
+        for _ in range(self.num_workers - len(self._workers)):
+            self._workers.append(asyncio.create_task(self._worker()))
+    
+    async def _worker(self):
+        """Process queued messages and send the replies"""
+        while True:
+            phone_number, message_text, message_type = await self._work_queue.get()
+            
+            # Another worker is busy with this sender: leave the message in
+            # that sender's backlog and move on, so one sender's messages are
+            # handled in order without holding up everyone else
+            backlog = self._backlogs.get(phone_number)
+            if backlog is not None:
+                backlog.append((message_text, message_type))
+                continue
+            
+            backlog = self._backlogs[phone_number] = deque()
+            try:
+                while True:
+                    await self._respond(phone_number, message_text, message_type)
+                    self._work_queue.task_done()
+                    if not backlog:
+                        break
+                    message_text, message_type = backlog.popleft()
+            finally:
+                del self._backlogs[phone_number]
+    
+    async def _respond(self, phone_number: str, message_text: str, message_type: str):
+        """Process one message and send the reply, logging any failure"""
+        try:
+            result = await self.process_message(phone_number, message_text, message_type)
+            await self._send_result(phone_number, result)
+        except Exception:
+            logger.exception("Error processing message from %s", phone_number)
+    
+    async def _send_result(self, phone_number: str, result: Dict[str, Any]):
+        """Deliver a processed result through the matching send callback"""
+        action = result.get("action")
+        message = result.get("message", "")
+        
+        if action == "send_interactive" and self._send_interactive_callback:
+            await self._send_interactive_callback(phone_number, message, result.get("buttons", []))
+        elif action == "send_products" and self._send_products_callback:
+            await self._send_products_callback(phone_number, result.get("products", []), message)
+        elif message and self._send_text_callback:
+            await self._send_text_callback(phone_number, message)
+    
+    async def join(self):
+        """Wait until all queued messages have been processed"""
+        await self._work_queue.join()
+    
+    async def close(self):
+        """Stop the background workers"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
+    async def _parse_intent(self, message: str) -> ParsedIntent:
+        """Parse a message, reusing the cached result for repeat inquiries"""
+        key = hashlib.sha256(message.strip().lower().encode()).digest()[:16]
+        now = time.monotonic()
         
-        elif context.state == ConversationState.AWAITING_PRODUCT_SELECTION:
-            return await self._handle_product_selection(context, message_text)
+        cached = self._parse_cache.get(key)
+        if cached and cached[0] > now:
+            self._parse_cache.move_to_end(key)
+            return replace(cached[1], raw_message=message)
         
-        elif context.state == ConversationState.AWAITING_QUANTITY:
-            return await self._handle_quantity_input(context, message_text)
+        parsed = await self.intent_parser.parse(message)
         
-        elif context.state == ConversationState.AWAITING_CONFIRMATION:
-            return await self._handle_confirmation(context, message_text)
+        # A failed LLM call falls back to pattern matching; caching that
+        # would serve the degraded parse to everyone for the whole TTL
+        if parsed.llm_failed:
+            return parsed
         
-        elif context.state == ConversationState.AWAITING_DELIVERY_INFO:
-            return await self._handle_delivery_info(context, message_text)
+        self._parse_cache[key] = (now + self.parse_cache_ttl, parsed)
+        self._parse_cache.move_to_end(key)
+        while len(self._parse_cache) > self.parse_cache_size:
+            self._parse_cache.popitem(last=False)
         
-        else:
-            # Default: treat as new inquiry
-            return await self._handle_new_inquiry(context, message_text)
+        return parsed
+    
+    async def _match_product(
+        self,
+        query: str,
+        brand: Optional[str],
+        category: Optional[str]
+    ) -> MatchResult:
+        """Run a catalog match in a worker thread, bounded by the match semaphore"""
+        async with self._match_semaphore:
+            return await asyncio.to_thread(
+                self.product_matcher.match,
+                query=query,
+                brand=brand,
+                category=category,
+                max_results=3
+            )
     
     async def _handle_new_inquiry(
         self,
@@ -149,7 +537,7 @@ class MessageHandler:
         context.state = ConversationState.PROCESSING
         
         # Parse the intent
-        parsed = await self.intent_parser.parse(message)
+        parsed = await self._parse_intent(message)
         context.parsed_intent = self.intent_parser.to_dict(parsed)
         
         # Check intent type
@@ -157,35 +545,26 @@ class MessageHandler:
             context.state = ConversationState.AWAITING_INQUIRY
             return {
                 "action": "send_text",
-                "message": "Hi! I'm the UnidBox Order Copilot. I can help you with:\n\n"
-                          "• Placing orders for hardware supplies\n"
-                          "• Checking product prices and availability\n"
-                          "• Tracking your order status\n\n"
-                          "Just tell me what you need! For example:\n"
-                          "_'I need 10 Acorn ceiling fans for a condo project'_"
+                "message": _REPLY_WELCOME
             }
         
         if parsed.intent_type == IntentType.ORDER_STATUS:
             return {
                 "action": "send_text",
-                "message": "To check your order status, please provide your order number.\n\n"
-                          "Example: _UB-20260131-ABC123_"
+                "message": _REPLY_ORDER_STATUS
             }
         
-        # Match products from the inquiry
+        # Match products from the inquiry concurrently
+        results = await asyncio.gather(*(
+            self._match_product(product_intent.raw_text, product_intent.brand, product_intent.category)
+            for product_intent in parsed.products
+        ))
+        
         matched_products = []
-        for product_intent in parsed.products:
-            result = self.product_matcher.match(
-                query=product_intent.raw_text,
-                brand=product_intent.brand,
-                category=product_intent.category,
-                max_results=3
-            )
+        for result in results:
             if result.matches:
-                matched_products.extend([
-                    self.product_matcher.to_dict(result)['matches'][0]
-                    for _ in range(1)  # Take best match
-                ])
+                # Take best match
+                matched_products.append(self.product_matcher.match_to_dict(result.matches[0]))
         
         context.matched_products = matched_products
         
@@ -208,12 +587,8 @@ class MessageHandler:
             
             return {
                 "action": "send_interactive",
-                "message": f"📋 *Order Summary*\n\n{summary}\n\n{notes}",
-                "buttons": [
-                    {"id": "confirm_order", "title": "Confirm Order"},
-                    {"id": "modify_order", "title": "Modify Order"},
-                    {"id": "cancel_order", "title": "Cancel"}
-                ]
+                "message": _REPLY_ORDER_SUMMARY.format(summary=summary, notes=notes),
+                "buttons": _ORDER_BUTTONS
             }
         
         # If order is ready, ask for confirmation
@@ -222,12 +597,8 @@ class MessageHandler:
         
         return {
             "action": "send_interactive",
-            "message": f"📋 *Order Summary*\n\n{summary}\n\nWould you like to proceed with this order?",
-            "buttons": [
-                {"id": "confirm_order", "title": "Confirm Order"},
-                {"id": "modify_order", "title": "Modify Order"},
-                {"id": "cancel_order", "title": "Cancel"}
-            ]
+            "message": _REPLY_ORDER_SUMMARY.format(summary=summary, notes=_REPLY_PROCEED),
+            "buttons": _ORDER_BUTTONS
         }
     
     async def _handle_product_selection(
@@ -250,8 +621,7 @@ class MessageHandler:
                 })
                 return {
                     "action": "send_text",
-                    "message": f"Great choice! *{product.name}* - ${product.price:.2f}\n\n"
-                              "How many units do you need?"
+                    "message": _REPLY_PRODUCT_SELECTED.format(name=product.name, price=product.price)
                 }
         
         # Treat as search query
@@ -267,13 +637,12 @@ class MessageHandler:
                     }
                     for m in result.matches
                 ],
-                "message": f"Found {result.total_found} products matching '{message}':"
+                "message": _REPLY_PRODUCTS_FOUND.format(total=result.total_found, query=message)
             }
         
         return {
             "action": "send_text",
-            "message": f"Sorry, I couldn't find any products matching '{message}'. "
-                      "Please try a different search term or browse our catalog."
+            "message": _REPLY_NO_PRODUCTS.format(query=message)
         }
     
     async def _handle_quantity_input(
@@ -282,35 +651,73 @@ class MessageHandler:
         message: str
     ) -> Dict[str, Any]:
         """Handle quantity input"""
-        try:
-            quantity = int(message.strip())
-            if quantity <= 0:
-                raise ValueError("Quantity must be positive")
-            
-            # Update pending item
-            if context.pending_items:
-                context.pending_items[-1]["quantity"] = quantity
-            
-            # Ask if they want to add more items
-            context.state = ConversationState.AWAITING_CONFIRMATION
-            
+        text = message.strip()
+        
+        # Quantities are short ASCII digit strings; anything else is rejected
+        # without going through int() and exception handling
+        if not (text.isascii() and text.isdigit()) or len(text) > self.MAX_QUANTITY_DIGITS:
             return {
-                "action": "send_interactive",
-                "message": f"Added {quantity} units to your order.\n\n"
-                          "Would you like to add more items or proceed to checkout?",
-                "buttons": [
-                    {"id": "add_more", "title": "Add More Items"},
-                    {"id": "checkout", "title": "Checkout"},
-                    {"id": "cancel_order", "title": "Cancel"}
-                ]
+                "action": "send_text",
+                "message": _REPLY_INVALID_QUANTITY
             }
         
-        except ValueError:
+        quantity = int(text)
+        if quantity <= 0:
             return {
                 "action": "send_text",
-                "message": "Please enter a valid quantity (a positive number).\n\n"
-                          "Example: _10_"
+                "message": _REPLY_INVALID_QUANTITY
             }
+        
+        # Update pending item
+        if context.pending_items:
+            context.pending_items[-1]["quantity"] = quantity
+        
+        # Ask if they want to add more items
+        context.state = ConversationState.AWAITING_CONFIRMATION
+        
+        return {
+            "action": "send_interactive",
+            "message": _REPLY_QUANTITY_ADDED.format(quantity=quantity),
+            "buttons": _ADD_MORE_BUTTONS
+        }
+    
+    def _match_confirmation(self, message_lower: str) -> Optional[ConfirmationAction]:
+        """
+        Pick the action for a free-form reply at the confirmation step.
+        
+        A keyword counts as the reply's leading word; a positive keyword
+        also counts anywhere in a reply of a few words ("ok confirm").
+        Questions, negated replies ("don't proceed") and replies that mix
+        cancel or modify with a positive keyword ("no problem, confirm")
+        are ambiguous, so the options are shown again.
+        
+        Args:
+            message_lower: Stripped, lowercased reply
+            
+        Returns:
+            The matched action, or None to ask again
+        """
+        hits = [
+            (hit.start(), self.CONFIRMATION_KEYWORDS[hit.group()])
+            for hit in self.CONFIRMATION_PATTERN.finditer(message_lower)
+        ]
+        if not hits or "?" in message_lower:
+            return None
+        
+        start, action = hits[0]
+        if self.NEGATION_PATTERN.search(message_lower[:start]):
+            return None
+        
+        destructive = [hit_action in self.DESTRUCTIVE_ACTIONS for _, hit_action in hits]
+        if any(destructive):
+            # Cancel and modify only count alone and as the leading word
+            return action if all(destructive) and start == 0 else None
+        
+        if self.NEGATION_PATTERN.search(message_lower):
+            return None
+        if start == 0 or len(message_lower.split()) <= self.MAX_FREE_FORM_WORDS:
+            return action
+        return None
     
     async def _handle_confirmation(
         self,
@@ -318,20 +725,18 @@ class MessageHandler:
         message: str
     ) -> Dict[str, Any]:
         """Handle order confirmation"""
-        message_lower = message.lower().strip()
+        message_lower = message.strip().lower()
+        action = self.CONFIRMATION_KEYWORDS.get(message_lower)
+        if action is None:
+            action = self._match_confirmation(message_lower)
         
-        if message_lower in ["confirm_order", "yes", "confirm", "proceed"]:
+        if action is ConfirmationAction.CONFIRM:
             # Check if we have delivery info
             if not context.extracted_order.get('delivery'):
                 context.state = ConversationState.AWAITING_DELIVERY_INFO
                 return {
                     "action": "send_text",
-                    "message": "Great! Please provide your delivery details:\n\n"
-                              "📍 Delivery address\n"
-                              "📅 Preferred delivery date\n"
-                              "📱 Contact number\n\n"
-                              "Example: _123 Hougang Ave 1, #01-01, Singapore 530123. "
-                              "Delivery next Monday. Contact: 91234567_"
+                    "message": _REPLY_DELIVERY_DETAILS
                 }
             
             # Order is confirmed
@@ -342,61 +747,44 @@ class MessageHandler:
                 "action": "order_confirmed",
                 "order_id": order_id,
                 "order": context.extracted_order,
-                "message": f"✅ *Order Confirmed!*\n\n"
-                          f"Order ID: *{order_id}*\n\n"
-                          "We'll process your order and send you a Delivery Order (DO) shortly.\n\n"
-                          "Thank you for ordering with UnidBox Hardware! 🙏"
+                "message": _REPLY_ORDER_CONFIRMED.format(order_id=order_id)
             }
         
-        elif message_lower in ["modify_order", "modify", "change"]:
+        elif action is ConfirmationAction.MODIFY:
             context.state = ConversationState.AWAITING_PRODUCT_SELECTION
             return {
                 "action": "send_text",
-                "message": "No problem! What would you like to change?\n\n"
-                          "You can:\n"
-                          "• Add more products\n"
-                          "• Change quantities\n"
-                          "• Remove items\n\n"
-                          "Just tell me what you need!"
+                "message": _REPLY_MODIFY
             }
         
-        elif message_lower in ["cancel_order", "cancel", "no"]:
+        elif action is ConfirmationAction.CANCEL:
             context.state = ConversationState.IDLE
             context.extracted_order = None
             context.matched_products = None
             return {
                 "action": "send_text",
-                "message": "Order cancelled. No worries!\n\n"
-                          "Feel free to start a new order anytime. Just tell me what you need! 😊"
+                "message": _REPLY_CANCELLED
             }
         
-        elif message_lower in ["add_more"]:
+        elif action is ConfirmationAction.ADD_MORE:
             context.state = ConversationState.AWAITING_PRODUCT_SELECTION
             return {
                 "action": "send_text",
-                "message": "Sure! What else would you like to add?\n\n"
-                          "Tell me the product name or search for items."
+                "message": _REPLY_ADD_MORE
             }
         
-        elif message_lower in ["checkout"]:
+        elif action is ConfirmationAction.CHECKOUT:
             # Proceed to delivery info
             context.state = ConversationState.AWAITING_DELIVERY_INFO
             return {
                 "action": "send_text",
-                "message": "Please provide your delivery details:\n\n"
-                          "📍 Delivery address\n"
-                          "📅 Preferred delivery date\n"
-                          "📱 Contact number"
+                "message": _REPLY_CHECKOUT
             }
         
         return {
             "action": "send_interactive",
-            "message": "Please select an option:",
-            "buttons": [
-                {"id": "confirm_order", "title": "Confirm Order"},
-                {"id": "modify_order", "title": "Modify Order"},
-                {"id": "cancel_order", "title": "Cancel"}
-            ]
+            "message": _REPLY_SELECT_OPTION,
+            "buttons": _ORDER_BUTTONS
         }
     
     async def _handle_delivery_info(
@@ -421,73 +809,75 @@ class MessageHandler:
         
         return {
             "action": "send_interactive",
-            "message": f"📋 *Final Order Summary*\n\n{summary}\n\n"
-                      f"📍 Delivery: {message}\n\n"
-                      "Ready to confirm?",
-            "buttons": [
-                {"id": "confirm_order", "title": "Confirm Order"},
-                {"id": "modify_order", "title": "Modify"},
-                {"id": "cancel_order", "title": "Cancel"}
-            ]
+            "message": _REPLY_FINAL_SUMMARY.format(summary=summary, delivery=message),
+            "buttons": _FINAL_ORDER_BUTTONS
         }
     
     def _get_or_create_context(self, phone_number: str) -> ConversationContext:
         """Get existing context or create new one"""
-        if phone_number not in self.conversations:
-            self.conversations[phone_number] = ConversationContext(
+        context = self.conversations.get(phone_number)
+        if context is None:
+            # Sweep idle conversations before the store grows
+            self.conversations.purge_expired()
+            context = ConversationContext(
                 phone_number=phone_number,
                 state=ConversationState.IDLE
             )
-        return self.conversations[phone_number]
+            self.conversations.set(phone_number, context)
+        return context
     
     def reset_context(self, phone_number: str):
         """Reset conversation context for a phone number"""
-        if phone_number in self.conversations:
-            del self.conversations[phone_number]
+        self.conversations.delete(phone_number)
     
     def _build_order_summary(self, order: ExtractedOrder) -> str:
         """Build a formatted order summary"""
-        lines = []
+        fmt = "${:.2f}".format
+        parts = [
+            f"• {item.product_name}\n  Qty: {item.quantity} × "
+            f"{fmt(item.unit_price) if item.unit_price > 0 else 'TBD'} = "
+            f"{fmt(item.total_price) if item.total_price > 0 else 'TBD'}"
+            for item in order.items
+        ] or [""]  # Keep the blank line before the totals
         
-        for item in order.items:
-            price_str = f"${item.unit_price:.2f}" if item.unit_price > 0 else "TBD"
-            total_str = f"${item.total_price:.2f}" if item.total_price > 0 else "TBD"
-            lines.append(f"• {item.product_name}\n  Qty: {item.quantity} × {price_str} = {total_str}")
-        
-        summary = "\n".join(lines)
-        summary += f"\n\n*Subtotal:* ${order.summary.subtotal:.2f}"
+        parts.append(f"\n*Subtotal:* {fmt(order.summary.subtotal)}")
         
         if order.summary.tax > 0:
-            summary += f"\n*GST (9%):* ${order.summary.tax:.2f}"
+            parts.append(f"*GST (9%):* {fmt(order.summary.tax)}")
         
         if order.summary.shipping > 0:
-            summary += f"\n*Shipping:* ${order.summary.shipping:.2f}"
+            parts.append(f"*Shipping:* {fmt(order.summary.shipping)}")
         
-        summary += f"\n*Total:* ${order.summary.total:.2f} SGD"
+        parts.append(f"*Total:* {fmt(order.summary.total)} SGD")
         
-        return summary
+        return "\n".join(parts)
     
     def _build_order_summary_from_dict(self, order_dict: Dict) -> str:
         """Build summary from order dictionary"""
-        lines = []
+        fmt = "${:.2f}".format
+        parts = []
         
         for item in order_dict.get('items', []):
             price = item.get('unit_price', 0)
             total = item.get('total_price', 0)
-            price_str = f"${price:.2f}" if price > 0 else "TBD"
-            total_str = f"${total:.2f}" if total > 0 else "TBD"
-            lines.append(f"• {item.get('product_name', 'Unknown')}\n  Qty: {item.get('quantity', 0)} × {price_str} = {total_str}")
+            parts.append(
+                f"• {item.get('product_name', 'Unknown')}\n  Qty: {item.get('quantity', 0)} × "
+                f"{fmt(price) if price > 0 else 'TBD'} = {fmt(total) if total > 0 else 'TBD'}"
+            )
         
         summary_data = order_dict.get('summary', {})
-        summary = "\n".join(lines)
-        summary += f"\n\n*Subtotal:* ${summary_data.get('subtotal', 0):.2f}"
+        parts = parts or [""]  # Keep the blank line before the totals
+        tax = summary_data.get('tax', 0)
+        shipping = summary_data.get('shipping', 0)
+        
+        parts.append(f"\n*Subtotal:* {fmt(summary_data.get('subtotal', 0))}")
         
-        if summary_data.get('tax', 0) > 0:
-            summary += f"\n*GST (9%):* ${summary_data.get('tax', 0):.2f}"
+        if tax > 0:
+            parts.append(f"*GST (9%):* {fmt(tax)}")
         
-        if summary_data.get('shipping', 0) > 0:
-            summary += f"\n*Shipping:* ${summary_data.get('shipping', 0):.2f}"
+        if shipping > 0:
+            parts.append(f"*Shipping:* {fmt(shipping)}")
         
-        summary += f"\n*Total:* ${summary_data.get('total', 0):.2f} SGD"
+        parts.append(f"*Total:* {fmt(summary_data.get('total', 0))} SGD")
         
-        return summary
+        return "\n".join(parts)
@@ -6,14 +6,25 @@ validates signatures, and routes messages to the message handler.
 """
 
 import hmac
-import hashlib
 import json
+import asyncio
+import logging
 from typing import Optional, Dict, Any, List, Callable
 from dataclasses import dataclass
 from datetime import datetime
 
+# orjson is optional; it parses webhook bodies straight from bytes and
+# its decode errors subclass json.JSONDecodeError
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
 class IncomingMessage:
     """Represents an incoming WhatsApp message"""
     message_id: str
@@ -30,7 +41,7 @@ class IncomingMessage:
     context_message_id: Optional[str] = None  # For replies
 
 
-@dataclass
+@dataclass(slots=True)
 class StatusUpdate:
     """Represents a message status update"""
     message_id: str
@@ -52,7 +63,9 @@ class WebhookHandler:
     def __init__(
         self,
         verify_token: Optional[str] = None,
-        app_secret: Optional[str] = None
+        app_secret: Optional[str] = None,
+        num_workers: int = 2,
+        queue_size: int = 10000
     ):
         """
         Initialize the webhook handler.
@@ -60,15 +73,24 @@ class WebhookHandler:
         Args:
             verify_token: Token for webhook verification
             app_secret: App secret for signature validation
+            num_workers: Number of background workers processing queued payloads
+            queue_size: Maximum number of payloads waiting to be processed
         """
         import os
         self.verify_token = verify_token or os.getenv('WHATSAPP_VERIFY_TOKEN', 'unidbox_verify_token')
         self.app_secret = app_secret or os.getenv('WHATSAPP_APP_SECRET', '')
+        self._app_secret_bytes = self.app_secret.encode()
         
         # Callbacks
         self._on_message: Optional[Callable] = None
         self._on_status: Optional[Callable] = None
         self._on_error: Optional[Callable] = None
+        
+        # Payloads are acknowledged first and processed by background
+        # workers, started on first use
+        self.num_workers = num_workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._workers: List[asyncio.Task] = []
     
     def set_message_callback(self, callback: Callable):
         """Set callback for incoming messages"""
@@ -116,13 +138,15 @@ class WebhookHandler:
         if not signature or not signature.startswith("sha256="):
             return False
         
-        expected_signature = hmac.new(
-            self.app_secret.encode(),
-            payload,
-            hashlib.sha256
-        ).hexdigest()
+        try:
+            provided_signature = bytes.fromhex(signature[7:])
+        except ValueError:
+            return False
+        
+        # One-shot HMAC avoids building an HMAC object per request
+        expected_signature = hmac.digest(self._app_secret_bytes, payload, 'sha256')
         
-        return hmac.compare_digest(signature[7:], expected_signature)
+        return hmac.compare_digest(provided_signature, expected_signature)
     
     async def handle_webhook(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -182,6 +206,51 @@ class WebhookHandler:
         
         return results
     
+    def enqueue(self, payload: Dict[str, Any]) -> bool:
+        """
+        Queue a webhook payload for background processing.
+        
+        Args:
+            payload: Parsed JSON payload from webhook
+            
+        Returns:
+            False if the queue is full and the payload was not accepted
+        """
+        self._ensure_workers()
+        try:
+            self._queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            return False
+        return True
+    
+    def _ensure_workers(self):
+        """Start the background workers if they are not running"""
+        self._workers = [task for task in self._workers if not task.done()]
+        for _ in range(self.num_workers - len(self._workers)):
+            self._workers.append(asyncio.create_task(self._worker()))
+    
+    async def _worker(self):
+        """Process queued webhook payloads"""
+        while True:
+            payload = await self._queue.get()
+            try:
+                results = await self.handle_webhook(payload)
+                for error in results["errors"]:
+                    logger.error("Webhook error: %s", error)
+            finally:
+                self._queue.task_done()
+    
+    async def join(self):
+        """Wait until all queued payloads have been processed"""
+        await self._queue.join()
+    
+    async def close(self):
+        """Stop the background workers"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
     def _parse_message(self, msg: Dict, value: Dict) -> Optional[IncomingMessage]:
         """Parse a message from the webhook payload"""
         message_type = msg.get("type", "text")
@@ -204,57 +273,73 @@ class WebhookHandler:
         )
         
         # Parse based on message type
-        if message_type == "text":
-            incoming.text = msg.get("text", {}).get("body", "")
-        
-        elif message_type == "interactive":
-            interactive = msg.get("interactive", {})
-            interactive_type = interactive.get("type", "")
-            incoming.interactive_type = interactive_type
-            
-            if interactive_type == "button_reply":
-                reply = interactive.get("button_reply", {})
-                incoming.interactive_id = reply.get("id", "")
-                incoming.interactive_title = reply.get("title", "")
-                incoming.text = incoming.interactive_id  # Use ID as text for processing
-            
-            elif interactive_type == "list_reply":
-                reply = interactive.get("list_reply", {})
-                incoming.interactive_id = reply.get("id", "")
-                incoming.interactive_title = reply.get("title", "")
-                incoming.text = incoming.interactive_id
-        
-        elif message_type == "image":
-            image = msg.get("image", {})
-            incoming.media_id = image.get("id", "")
-            incoming.caption = image.get("caption", "")
-        
-        elif message_type == "document":
-            document = msg.get("document", {})
-            incoming.media_id = document.get("id", "")
-            incoming.caption = document.get("caption", "")
-        
-        elif message_type == "audio":
-            audio = msg.get("audio", {})
-            incoming.media_id = audio.get("id", "")
-        
-        elif message_type == "location":
-            location = msg.get("location", {})
-            lat = location.get("latitude", "")
-            lon = location.get("longitude", "")
-            incoming.text = f"Location: {lat}, {lon}"
+        parser = self._MESSAGE_PARSERS.get(message_type)
+        if parser:
+            parser(msg, incoming)
         
         return incoming
     
+    @staticmethod
+    def _parse_text(msg: Dict, incoming: IncomingMessage):
+        """Fill in a text message"""
+        incoming.text = msg.get("text", {}).get("body", "")
+    
+    @staticmethod
+    def _parse_interactive(msg: Dict, incoming: IncomingMessage):
+        """Fill in a button or list reply"""
+        interactive = msg.get("interactive", {})
+        interactive_type = interactive.get("type", "")
+        incoming.interactive_type = interactive_type
+        
+        if interactive_type in ("button_reply", "list_reply"):
+            reply = interactive.get(interactive_type, {})
+            incoming.interactive_id = reply.get("id", "")
+            incoming.interactive_title = reply.get("title", "")
+            incoming.text = incoming.interactive_id  # Use ID as text for processing
+    
+    @staticmethod
+    def _parse_media(msg: Dict, incoming: IncomingMessage):
+        """Fill in an image or document message"""
+        media = msg.get(incoming.message_type, {})
+        incoming.media_id = media.get("id", "")
+        incoming.caption = media.get("caption", "")
+    
+    @staticmethod
+    def _parse_audio(msg: Dict, incoming: IncomingMessage):
+        """Fill in an audio message"""
+        audio = msg.get("audio", {})
+        incoming.media_id = audio.get("id", "")
+    
+    @staticmethod
+    def _parse_location(msg: Dict, incoming: IncomingMessage):
+        """Fill in a location message"""
+        location = msg.get("location", {})
+        lat = location.get("latitude", "")
+        lon = location.get("longitude", "")
+        incoming.text = f"Location: {lat}, {lon}"
+    
+    # Message type -> parser filling in the type-specific fields
+    _MESSAGE_PARSERS = {
+        "text": _parse_text,
+        "interactive": _parse_interactive,
+        "image": _parse_media,
+        "document": _parse_media,
+        "audio": _parse_audio,
+        "location": _parse_location,
+    }
+    
     def _parse_status(self, status: Dict) -> StatusUpdate:
         """Parse a status update from the webhook payload"""
+        errors = status.get("errors")
+        error = errors[0] if errors else None
+        
         return StatusUpdate(
             message_id=status.get("id", ""),
             recipient=status.get("recipient_id", ""),
             status=status.get("status", ""),
             timestamp=status.get("timestamp", ""),
-            error_code=status.get("errors", [{}])[0].get("code") if status.get("errors") else None,
-            error_message=status.get("errors", [{}])[0].get("message") if status.get("errors") else None
+            error_code=error.get("code") if error else None,
+            error_message=error.get("message") if error else None
         )
 
 
@@ -286,15 +371,16 @@ def create_webhook_routes(handler: WebhookHandler):
         if not handler.validate_signature(body, signature):
             return 401, {"error": "Invalid signature"}
         
-        # Parse and handle payload
+        # Parse and queue payload; it is processed after we respond
         try:
-            payload = json.loads(body)
-            result = await handler.handle_webhook(payload)
-            return 200, result
+            payload = json_loads(body)
         except json.JSONDecodeError:
             return 400, {"error": "Invalid JSON"}
-        except Exception as e:
-            return 500, {"error": str(e)}
+        
+        if not handler.enqueue(payload):
+            # Meta retries deliveries that are not acknowledged
+            return 503, {"error": "Webhook queue full"}
+        return 200, {"ok": True}
     
     return {
         "get": get_handler,
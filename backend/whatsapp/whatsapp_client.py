@@ -7,11 +7,44 @@ to send messages, templates, and interactive messages to dealers.
 
 import os
 import json
+import math
+import asyncio
 import httpx
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
 from enum import Enum
 
+# HTTP/2 lets concurrent sends share one connection (requires httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# orjson is optional; it serializes outbound payloads straight to bytes
+try:
+    import orjson
+    
+    def json_dumps(payload: Dict) -> bytes:
+        return orjson.dumps(payload)
+except ImportError:
+    def json_dumps(payload: Dict) -> bytes:
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+# Deletes every ASCII character except 0-9
+_NON_DIGITS = str.maketrans('', '', ''.join(chr(c) for c in range(128) if not chr(c).isdigit()))
+
+
+@lru_cache(maxsize=1024)
+def _product_row(product_id: str, name: str, price: float) -> Dict[str, str]:
+    """Product list row for a product; shared between calls, so never mutated"""
+    return {
+        "id": f"product_{product_id}",
+        "title": name[:24],  # Max 24 chars
+        "description": f"${price:.2f} SGD"[:72]  # Max 72 chars
+    }
+
 
 class MessageType(Enum):
     """Types of WhatsApp messages"""
@@ -22,7 +55,7 @@ class MessageType(Enum):
     DOCUMENT = "document"
 
 
-@dataclass
+@dataclass(slots=True)
 class WhatsAppConfig:
     """Configuration for WhatsApp Business API"""
     phone_number_id: str
@@ -35,7 +68,7 @@ class WhatsAppConfig:
         return f"{self.base_url}/{self.api_version}/{self.phone_number_id}/messages"
 
 
-@dataclass
+@dataclass(slots=True)
 class MessageResult:
     """Result of sending a WhatsApp message"""
     success: bool
@@ -53,6 +86,18 @@ class WhatsAppClient:
     including text, templates, and interactive messages.
     """
     
+    # Retries for 429 and 503 responses, with exponential backoff (seconds)
+    # unless the response gives a Retry-After (capped at MAX_RETRY_AFTER)
+    MAX_RETRIES = 3
+    RETRY_BACKOFF = 0.5
+    RETRY_STATUSES = frozenset({429, 503})
+    MAX_RETRY_AFTER = 10.0
+    
+    # Fixed text of the product options list
+    PRODUCT_LIST_BUTTON = "View Products"
+    PRODUCT_LIST_HEADER = "UnidBox Hardware"
+    PRODUCT_LIST_FOOTER = "Select a product to add to your order"
+    
     def __init__(
         self,
         phone_number_id: Optional[str] = None,
@@ -75,20 +120,38 @@ class WhatsAppClient:
                 access_token=access_token or os.getenv('WHATSAPP_ACCESS_TOKEN', '')
             )
         
+        # Resolved once; the config does not change after construction
+        self._api_url = self.config.api_url
+        self._headers = httpx.Headers({
+            "Authorization": f"Bearer {self.config.access_token}",
+            "Content-Type": "application/json"
+        })
+        
         self._client: Optional[httpx.AsyncClient] = None
-    
+            
     async def _get_client(self) -> httpx.AsyncClient:
         """Get or create HTTP client"""
         if self._client is None:
             self._client = httpx.AsyncClient(
-                headers={
-                    "Authorization": f"Bearer {self.config.access_token}",
-                    "Content-Type": "application/json"
-                },
-                timeout=30.0
+                headers=self._headers,
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=50,
+                    keepalive_expiry=60.0
+                ),
+                timeout=httpx.Timeout(30.0, connect=5.0)
             )
         return self._client
     
+    async def warmup(self):
+        """Open the connection to the API host ahead of the first send"""
+        client = await self._get_client()
+        try:
+            await client.head(self.config.base_url)
+        except httpx.HTTPError:
+            pass
+    
     async def close(self):
         """Close the HTTP client"""
         if self._client:
@@ -325,25 +388,22 @@ Order ID: {order_id}
         Returns:
             MessageResult with send status
         """
+        rows = []
+        for p in products[:10]:  # Max 10 items
+            rows.append(_product_row(p['product_id'], p['name'], p['price']))
+        
         sections = [{
             "title": "Available Products",
-            "rows": [
-                {
-                    "id": f"product_{p['product_id']}",
-                    "title": p['name'][:24],  # Max 24 chars
-                    "description": f"${p['price']:.2f} SGD"[:72]  # Max 72 chars
-                }
-                for p in products[:10]  # Max 10 items
-            ]
+            "rows": rows
         }]
         
         return await self.send_interactive_list(
             to=to,
             body_text=intro_text,
-            button_text="View Products",
+            button_text=self.PRODUCT_LIST_BUTTON,
             sections=sections,
-            header_text="UnidBox Hardware",
-            footer_text="Select a product to add to your order"
+            header_text=self.PRODUCT_LIST_HEADER,
+            footer_text=self.PRODUCT_LIST_FOOTER
         )
     
     async def send_document(
@@ -383,6 +443,31 @@ Order ID: {order_id}
         
         return await self._send_message(to, payload)
     
+    async def send_bulk(
+        self,
+        messages: List[Tuple[str, Dict]],
+        concurrency: int = 32
+    ) -> List[MessageResult]:
+        """
+        Send many prepared messages concurrently over the shared client.
+        
+        Args:
+            messages: List of (recipient, payload) pairs
+            concurrency: Maximum number of requests in flight at once
+            
+        Returns:
+            List of MessageResult in the same order as messages
+        """
+        sem = asyncio.Semaphore(concurrency)
+        
+        async def send_one(to: str, payload: Dict) -> MessageResult:
+            async with sem:
+                return await self._send_message(to, payload)
+        
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(send_one(to, payload)) for to, payload in messages]
+        return [task.result() for task in tasks]
+    
     async def _send_message(self, to: str, payload: Dict) -> MessageResult:
         """Send a message using the WhatsApp API"""
         if not self.config.phone_number_id or not self.config.access_token:
@@ -395,7 +480,17 @@ Order ID: {order_id}
         
         try:
             client = await self._get_client()
-            response = await client.post(self.config.api_url, json=payload)
+            body = json_dumps(payload)
+            response = await client.post(self._api_url, content=body)
+            
+            # Back off and retry only when rate limited or the service is
+            # temporarily unavailable; other server errors may already have
+            # sent the message, so retrying them risks duplicates
+            for attempt in range(self.MAX_RETRIES):
+                if response.status_code not in self.RETRY_STATUSES:
+                    break
+                await asyncio.sleep(self._retry_delay(response, attempt))
+                response = await client.post(self._api_url, content=body)
             
             if response.status_code == 200:
                 data = response.json()
@@ -425,6 +520,18 @@ Order ID: {order_id}
                 error=str(e)
             )
     
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        """Seconds to wait before a retry, honouring a Retry-After header"""
+        try:
+            retry_after = float(response.headers.get('retry-after', ''))
+        except ValueError:
+            retry_after = math.nan
+        if not math.isfinite(retry_after):
+            return self.RETRY_BACKOFF * (2 ** attempt)
+        # The dealer's later replies wait behind this one, so a long
+        # Retry-After is capped
+        return min(max(retry_after, 0.0), self.MAX_RETRY_AFTER)
+    
     def format_phone_number(self, phone: str) -> str:
         """
         Format a phone number for WhatsApp API.
@@ -433,7 +540,10 @@ Order ID: {order_id}
         Adds Singapore country code if not present.
         """
         # Remove common formatting characters
-        cleaned = ''.join(c for c in phone if c.isdigit())
+        if phone.isascii():
+            cleaned = phone.translate(_NON_DIGITS)
+        else:
+            cleaned = ''.join(c for c in phone if c.isdigit())
         
         # Add Singapore country code if not present
         if len(cleaned) == 8:  # Singapore local number
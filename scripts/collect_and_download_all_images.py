@@ -3,91 +3,165 @@
 Collect all image URLs from console outputs and download them
 """
 
+import asyncio
 import json
 import os
 import re
-import requests
-import time
 import glob
+from collections import defaultdict
+from urllib.parse import urlparse
+
+import aiohttp
+
+# Run the downloads on uvloop's faster event loop when it is installed
+# (uvloop.run needs uvloop 0.18 or later)
+try:
+    import uvloop
+    run = uvloop.run
+except (ImportError, AttributeError):
+    run = asyncio.run
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
+    'Referer': 'https://www.lazada.sg/'
+}
+
+# Maximum number of downloads in flight at once, per host and overall
+CONCURRENCY = 8
+TOTAL_CONCURRENCY = 64
+
+# Retries for rate limiting and server errors, with exponential backoff
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Read size when streaming an image to disk
+CHUNK_SIZE = 256 * 1024
+
+# Characters replaced with '_' when building a filename from a product name
+UNSAFE_FILENAME_CHARS = re.compile(r'[^\w\-]')
+
+# Start of a JSON array of objects in console output; anchored on the
+# opening bracket only, so there is nothing to backtrack over
+ARRAY_START = re.compile(r'\[\s*\{')
+JSON_DECODER = json.JSONDecoder()
 
 def extract_images_from_file(filepath):
     """Extract image data from console output file"""
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             content = f.read()
+    except Exception as e:
+        return
+    
+    # Decode each JSON array of objects in place, starting at its opening
+    # bracket, rather than matching whole arrays with a backtracking regex
+    match = ARRAY_START.search(content)
+    
+    while match:
+        try:
+            data, end = JSON_DECODER.raw_decode(content, match.start())
+        except ValueError:
+            match = ARRAY_START.search(content, match.start() + 1)
+            continue
         
-        # Find JSON arrays in the content
-        images = []
-        
-        # Try to find JSON array pattern
-        pattern = r'\[\s*\{[^]]+\}\s*\]'
-        matches = re.findall(pattern, content, re.DOTALL)
-        
-        for match in matches:
-            try:
-                data = json.loads(match)
-                for item in data:
-                    if isinstance(item, dict) and 'item_id' in item and 'image_url' in item:
-                        img_url = item.get('image_url', '')
-                        if img_url and not img_url.startswith('data:'):
-                            images.append(item)
-            except:
-                pass
+        for item in data:
+            if isinstance(item, dict) and 'item_id' in item and 'image_url' in item:
+                img_url = item.get('image_url', '')
+                if img_url and not img_url.startswith('data:'):
+                    yield item
         
-        return images
-    except Exception as e:
-        return []
+        match = ARRAY_START.search(content, end)
 
-def download_image(item_id, image_url, name, img_dir):
+async def download_image(session, host_limits, item_id, image_url, name, img_dir, existing):
     """Download a single image"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
-        'Referer': 'https://www.lazada.sg/'
-    }
-    
     # Fix double extension
     image_url = image_url.replace('.jpg.jpg', '.jpg')
     image_url = image_url.replace('.png_200x200q80.png', '.png')
     
     # Create safe filename
-    safe_name = re.sub(r'[^\w\-]', '_', name)[:40]
+    safe_name = UNSAFE_FILENAME_CHARS.sub('_', name)[:40]
     
     # Determine extension
     ext = '.jpg'
     if '.png' in image_url:
         ext = '.png'
     
-    save_path = os.path.join(img_dir, f"{item_id}_{safe_name}{ext}")
+    filename = f"{item_id}_{safe_name}{ext}"
+    save_path = os.path.join(img_dir, filename)
     
-    if os.path.exists(save_path):
+    if filename in existing:
         return {'item_id': item_id, 'status': 'exists', 'path': save_path}
     
     try:
-        response = requests.get(image_url, headers=headers, timeout=30, stream=True)
-        if response.status_code == 200:
-            with open(save_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            return {'item_id': item_id, 'status': 'success', 'path': save_path}
-        else:
-            return {'item_id': item_id, 'status': 'failed', 'error': f'HTTP {response.status_code}'}
+        async with host_limits[urlparse(image_url).netloc]:
+            for attempt in range(MAX_RETRIES + 1):
+                async with session.get(image_url) as response:
+                    if response.status == 200:
+                        with open(save_path, 'wb') as f:
+                            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                                f.write(chunk)
+                        return {'item_id': item_id, 'status': 'success', 'path': save_path}
+                    if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                        return {'item_id': item_id, 'status': 'failed', 'error': f'HTTP {response.status}'}
+                await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
     except Exception as e:
         return {'item_id': item_id, 'status': 'failed', 'error': str(e)}
 
+async def download_all(all_images, img_dir):
+    """Download all images concurrently over a shared connection pool"""
+    results = {'success': 0, 'failed': 0, 'exists': 0}
+    image_paths = {}
+    
+    # Rate limit per CDN host; images spread across hosts download in parallel
+    host_limits = defaultdict(lambda: asyncio.Semaphore(CONCURRENCY))
+    
+    # One directory listing instead of a stat() per image
+    existing = {entry.name for entry in os.scandir(img_dir)}
+    connector = aiohttp.TCPConnector(limit=TOTAL_CONCURRENCY, limit_per_host=CONCURRENCY, keepalive_timeout=60)
+    timeout = aiohttp.ClientTimeout(total=30)
+    
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS) as session:
+        async def fetch(item):
+            result = await download_image(
+                session,
+                host_limits,
+                item['item_id'],
+                item['image_url'],
+                item.get('name', ''),
+                img_dir,
+                existing
+            )
+            return item, result
+        
+        tasks = [fetch(item) for item in all_images]
+        for i, task in enumerate(asyncio.as_completed(tasks)):
+            item, result = await task
+            
+            status = result['status']
+            results[status] = results.get(status, 0) + 1
+            
+            if status in ['success', 'exists']:
+                image_paths[result['item_id']] = result['path']
+                print(f"[{i+1}/{len(all_images)}] ✓ {item.get('name', '')[:40]}")
+            else:
+                print(f"[{i+1}/{len(all_images)}] ✗ {item.get('name', '')[:40]} - {result.get('error', '')}")
+    
+    return results, image_paths
+
 def main():
     # Collect all images from console outputs
     console_dir = '/home/ubuntu/console_outputs/'
-    all_images = []
-    seen_ids = set()
+    # Keyed by item_id: dedups and keeps first-seen order
+    images_by_id = {}
     
     for filepath in glob.glob(os.path.join(console_dir, '*.txt')):
         images = extract_images_from_file(filepath)
         for img in images:
             item_id = img.get('item_id', '')
-            if item_id and item_id not in seen_ids:
-                seen_ids.add(item_id)
-                all_images.append(img)
+            if item_id and item_id not in images_by_id:
+                images_by_id[item_id] = img
     
     # Also load from page1_images.json
     try:
@@ -95,12 +169,13 @@ def main():
             page1 = json.load(f)
             for img in page1:
                 item_id = img.get('item_id', '')
-                if item_id and item_id not in seen_ids:
-                    seen_ids.add(item_id)
-                    all_images.append(img)
+                if item_id and item_id not in images_by_id:
+                    images_by_id[item_id] = img
     except:
         pass
     
+    all_images = list(images_by_id.values())
+    
     print(f"Found {len(all_images)} unique products with images")
     
     # Save all image URLs
@@ -111,28 +186,7 @@ def main():
     img_dir = '/home/ubuntu/unidbox_images'
     os.makedirs(img_dir, exist_ok=True)
     
-    results = {'success': 0, 'failed': 0, 'exists': 0}
-    image_paths = {}
-    
-    for i, item in enumerate(all_images):
-        result = download_image(
-            item['item_id'],
-            item['image_url'],
-            item.get('name', ''),
-            img_dir
-        )
-        
-        status = result['status']
-        results[status] = results.get(status, 0) + 1
-        
-        if status in ['success', 'exists']:
-            image_paths[result['item_id']] = result['path']
-            print(f"[{i+1}/{len(all_images)}] ✓ {item.get('name', '')[:40]}")
-        else:
-            print(f"[{i+1}/{len(all_images)}] ✗ {item.get('name', '')[:40]} - {result.get('error', '')}")
-        
-        if status == 'success':
-            time.sleep(0.2)
+    results, image_paths = run(download_all(all_images, img_dir))
     
     print(f"\nResults: {results['success']} downloaded, {results['exists']} existed, {results['failed']} failed")
     
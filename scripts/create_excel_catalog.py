@@ -1,174 +1,278 @@
 #!/usr/bin/env python3
 """
-Create a comprehensive Excel product catalog for UnidBox Hardware
+Create a comprehensive product catalog for UnidBox Hardware
+
+Writes Parquet and CSV copies of the catalog; pass --xlsx to also build
+the Excel workbook with category and brand summary sheets.
 """
 
-import json
+import argparse
 import pandas as pd
 import re
+import xlsxwriter
 
-def clean_product_name(name):
-    """Extract clean product name and category info"""
-    # Remove common suffixes
-    parts = name.split('/')
-    main_name = parts[0].strip()
-    return main_name
+from json_io import read_json
 
-def extract_brand(name):
-    """Extract brand from product name"""
-    name_lower = name.lower()
-    brands = {
-        'spin': 'Spin',
-        'acorn': 'Acorn',
-        'alaska': 'Alaska',
-        'crestar': 'Crestar',
-        'fanco': 'Fanco',
-        'tecno': 'Tecno',
-        'ef ': 'EF',
-        'pozzi': 'Pozzi',
-        'makita': 'Makita',
-        'worx': 'WORX',
-        'ingco': 'INGCO',
-        'boshsini': 'Boshsini',
-        'aerogaz': 'Aerogaz',
-        'mayer': 'Mayer',
-        'fujioh': 'Fujioh',
-        'grohe': 'Grohe',
-        'schneider': 'Schneider',
-        'alpha': 'Alpha',
-        'kolm': 'KOLM',
-        'arino': 'Arino',
-        'rubine': 'Rubine',
-        'vita': 'VITA',
-        'decco': 'Decco'
-    }
-    
-    for key, brand in brands.items():
-        if key in name_lower:
-            return brand
-    return 'Other'
-
-def extract_category(name):
-    """Extract product category"""
-    name_lower = name.lower()
+# Parquet output needs the optional pyarrow package and is skipped without it
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Fields read from each scraped product record
+SOURCE_FIELDS = ['item_id', 'name', 'price', 'original_price', 'discount', 'sold', 'rating', 'url']
+
+# Catalog columns copied unchanged from the scraped records
+PASS_THROUGH_COLUMNS = ['Item ID', 'Discount', 'Sold', 'Rating', 'URL']
+
+# Currency symbol and thousands separators stripped before parsing a price
+PRICE_SYMBOLS = str.maketrans('', '', '$,')
+
+# Brand keywords in priority order: when several appear in a name, the
+# earliest entry here wins
+BRANDS = {
+    'spin': 'Spin',
+    'acorn': 'Acorn',
+    'alaska': 'Alaska',
+    'crestar': 'Crestar',
+    'fanco': 'Fanco',
+    'tecno': 'Tecno',
+    'ef ': 'EF',
+    'pozzi': 'Pozzi',
+    'makita': 'Makita',
+    'worx': 'WORX',
+    'ingco': 'INGCO',
+    'boshsini': 'Boshsini',
+    'aerogaz': 'Aerogaz',
+    'mayer': 'Mayer',
+    'fujioh': 'Fujioh',
+    'grohe': 'Grohe',
+    'schneider': 'Schneider',
+    'alpha': 'Alpha',
+    'kolm': 'KOLM',
+    'arino': 'Arino',
+    'rubine': 'Rubine',
+    'vita': 'VITA',
+    'decco': 'Decco'
+}
+
+# Category keywords in priority order, mirroring the original if/elif chain
+CATEGORY_KEYWORDS = {
+    'ceiling fan': 'Ceiling Fans',
+    'hood': 'Range Hoods',
+    'chimney': 'Range Hoods',
+    'hob': 'Hobs & Stoves',
+    'stove': 'Hobs & Stoves',
+    'basin tap': 'Basin Taps',
+    'basin faucet': 'Basin Taps',
+    'basin mixer': 'Basin Taps',
+    'kitchen tap': 'Kitchen Taps',
+    'kitchen faucet': 'Kitchen Taps',
+    'kitchen sink tap': 'Kitchen Taps',
+    'kitchen mixer': 'Kitchen Taps',
+    'bath mixer': 'Bathroom Fixtures',
+    'shower': 'Bathroom Fixtures',
+    'sink': 'Kitchen Sinks',
+    'oven': 'Ovens',
+    'water heater': 'Water Heaters',
+    'trimmer': 'Power Tools',
+    'blower': 'Power Tools',
+    'washer': 'Power Tools',
+    'grinder': 'Power Tools',
+    'spanner': 'Hand Tools',
+    'tool': 'Hand Tools',
+    'rack': 'Storage & Organization',
+    'shelf': 'Storage & Organization',
+    'hanger': 'Storage & Organization',
+    'mcb': 'Electrical',
+    'socket': 'Electrical',
+    'cabinet': 'Bathroom Cabinets',
+    'vanity': 'Bathroom Cabinets',
+    'light': 'Lighting',
+    'chandelier': 'Lighting',
+    'pendant': 'Lighting',
+    'radio': 'Power Tools'
+}
+
+# pyahocorasick is optional; its automaton finds every keyword in one pass
+# over the name without the regex engine's per-position alternation tries
+try:
+    import ahocorasick
     
-    if 'ceiling fan' in name_lower or ('fan' in name_lower and 'corner' in name_lower):
+    def _keyword_finder(keywords):
+        """Build a function returning every keyword occurrence in a string"""
+        automaton = ahocorasick.Automaton()
+        for key in keywords:
+            automaton.add_word(key, key)
+        automaton.make_automaton()
+        return lambda text: [key for _, key in automaton.iter(text)]
+except ImportError:
+    def _keyword_finder(keywords):
+        """
+        Build a function returning every keyword occurrence in a string.
+        
+        The lookahead makes matches zero-width, so overlapping keywords are
+        all found in a single scan of the name.
+        """
+        return re.compile('(?=(%s))' % '|'.join(map(re.escape, keywords))).findall
+
+find_brands = _keyword_finder(BRANDS)
+BRAND_RANK = {key: rank for rank, key in enumerate(BRANDS)}
+
+find_categories = _keyword_finder(CATEGORY_KEYWORDS)
+CATEGORY_RANK = {key: rank for rank, key in enumerate(CATEGORY_KEYWORDS)}
+
+def extract_brand(name_lower):
+    """Extract brand from a lowercased product name"""
+    found = find_brands(name_lower)
+    if not found:
+        return 'Other'
+    # Real product names almost always mention a single brand keyword
+    if len(found) == 1:
+        return BRANDS[found[0]]
+    return BRANDS[min(found, key=BRAND_RANK.__getitem__)]
+
+def extract_category(name_lower):
+    """Extract product category from a lowercased product name"""
+    # Corner fans are not named "ceiling fan" but belong with them
+    if 'fan' in name_lower and 'corner' in name_lower:
         return 'Ceiling Fans'
-    elif 'hood' in name_lower or 'chimney' in name_lower:
-        return 'Range Hoods'
-    elif 'hob' in name_lower or 'stove' in name_lower:
-        return 'Hobs & Stoves'
-    elif 'basin tap' in name_lower or 'basin faucet' in name_lower or 'basin mixer' in name_lower:
-        return 'Basin Taps'
-    elif 'kitchen tap' in name_lower or 'kitchen faucet' in name_lower or 'kitchen sink tap' in name_lower or 'kitchen mixer' in name_lower:
-        return 'Kitchen Taps'
-    elif 'bath mixer' in name_lower or 'shower' in name_lower:
-        return 'Bathroom Fixtures'
-    elif 'sink' in name_lower:
-        return 'Kitchen Sinks'
-    elif 'oven' in name_lower:
-        return 'Ovens'
-    elif 'water heater' in name_lower:
-        return 'Water Heaters'
-    elif 'trimmer' in name_lower or 'blower' in name_lower or 'washer' in name_lower or 'grinder' in name_lower:
-        return 'Power Tools'
-    elif 'spanner' in name_lower or 'tool' in name_lower:
-        return 'Hand Tools'
-    elif 'rack' in name_lower or 'shelf' in name_lower or 'hanger' in name_lower:
-        return 'Storage & Organization'
-    elif 'mcb' in name_lower or 'socket' in name_lower:
-        return 'Electrical'
-    elif 'cabinet' in name_lower or 'vanity' in name_lower:
-        return 'Bathroom Cabinets'
-    elif 'light' in name_lower or 'chandelier' in name_lower or 'pendant' in name_lower:
-        return 'Lighting'
-    elif 'radio' in name_lower:
-        return 'Power Tools'
-    else:
+    
+    found = find_categories(name_lower)
+    if not found:
         return 'Other'
+    if len(found) == 1:
+        return CATEGORY_KEYWORDS[found[0]]
+    return CATEGORY_KEYWORDS[min(found, key=CATEGORY_RANK.__getitem__)]
+
+def classify(name):
+    """Brand and category of a product name, lowercasing it only once"""
+    name_lower = name.lower()
+    return extract_brand(name_lower), extract_category(name_lower)
+
+def parse_prices(prices):
+    """Parse a Series of price strings like '$1,449.00' to floats (0.0 if invalid)"""
+    cleaned = prices.astype(str).str.translate(PRICE_SYMBOLS)
+    return pd.to_numeric(cleaned, errors='coerce').fillna(0.0)
 
-def parse_price(price_str):
-    """Parse price string to float"""
-    if not price_str:
-        return 0.0
-    try:
-        return float(price_str.replace('$', '').replace(',', ''))
-    except:
-        return 0.0
+def summarize(df, key):
+    """Product count and price range per value of key, largest groups first"""
+    summary = df.groupby(key).agg(**{
+        'Product Count': ('Item ID', 'count'),
+        'Min Price': ('Price (SGD)', 'min'),
+        'Max Price': ('Price (SGD)', 'max'),
+        'Avg Price': ('Price (SGD)', 'mean')
+    }).round(2)
+    return summary.sort_values('Product Count', ascending=False).reset_index()
+
+def write_sheet(wb, title, df):
+    """Write a DataFrame to a new sheet, one row at a time in row order"""
+    ws = wb.add_worksheet(title)
+    ws.write_row(0, 0, list(df.columns))
+    for row_num, row in enumerate(df.itertuples(index=False, name=None), start=1):
+        ws.write_row(row_num, 0, row)
+
+def write_excel(df, excel_path):
+    """Write the catalog and its category and brand summaries to a workbook"""
+    # constant_memory flushes each row to disk as soon as the next one starts;
+    # rows must therefore be written strictly in order, sheet by sheet.
+    # URLs are kept as plain strings rather than converted to hyperlinks,
+    # and NaN or inf prices become error cells instead of aborting the write.
+    wb = xlsxwriter.Workbook(excel_path, {
+        'constant_memory': True,
+        'strings_to_urls': False,
+        'nan_inf_to_errors': True
+    })
+    
+    # Main catalog sheet
+    write_sheet(wb, 'All Products', df)
+    
+    # Category summary sheet
+    write_sheet(wb, 'Category Summary', summarize(df, 'Category'))
+    
+    # Brand summary sheet
+    write_sheet(wb, 'Brand Summary', summarize(df, 'Brand'))
+    
+    wb.close()
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='Build the UnidBox product catalog files')
+    parser.add_argument('--xlsx', action='store_true',
+                        help='also write the Excel workbook with category and brand summaries')
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    
     # Load products
-    with open('/home/ubuntu/unidbox_products_final.json', 'r', encoding='utf-8') as f:
-        products = json.load(f)
+    products = read_json('/home/ubuntu/unidbox_products_final.json')
     
     print(f"Processing {len(products)} products...")
     
-    # Process each product
-    processed = []
-    for p in products:
-        name = p.get('name', '')
-        price = parse_price(p.get('price', ''))
-        original_price = parse_price(p.get('original_price', ''))
-        
-        # Calculate discount percentage if not provided
-        discount = p.get('discount', '')
-        if not discount and original_price > 0 and price > 0:
-            discount_pct = ((original_price - price) / original_price) * 100
-            if discount_pct > 0:
-                discount = f"{discount_pct:.0f}%"
-        
-        processed.append({
-            'Item ID': p.get('item_id', ''),
-            'Product Name': clean_product_name(name),
-            'Full Name': name,
-            'Brand': extract_brand(name),
-            'Category': extract_category(name),
-            'Price (SGD)': price,
-            'Original Price (SGD)': original_price if original_price > 0 else '',
-            'Discount': discount,
-            'Sold': p.get('sold', ''),
-            'Rating': p.get('rating', ''),
-            'URL': p.get('url', '')
-        })
+    # Build each column over the whole catalog rather than product by product
+    raw = pd.DataFrame(products).reindex(columns=SOURCE_FIELDS).fillna('')
+    names = raw['name'].astype(str)
+    price = parse_prices(raw['price'])
+    original_price = parse_prices(raw['original_price'])
+    
+    # Calculate discount percentage if not provided
+    discount_pct = (original_price - price) / original_price * 100
+    needs_discount = (
+        ~raw['discount'].astype(bool)
+        & (original_price > 0) & (price > 0) & (discount_pct > 0)
+    )
+    discount = raw['discount'].mask(needs_discount, discount_pct.map('{:.0f}%'.format))
+    
+    classified = names.map(classify)
     
-    # Create DataFrame
-    df = pd.DataFrame(processed)
+    df = pd.DataFrame({
+        'Item ID': raw['item_id'],
+        'Product Name': names.str.split('/').str[0].str.strip(),
+        'Full Name': names,
+        'Brand': classified.str[0],
+        'Category': classified.str[1],
+        'Price (SGD)': price,
+        'Original Price (SGD)': original_price.astype(object).where(original_price > 0, ''),
+        'Discount': discount,
+        'Sold': raw['sold'],
+        'Rating': raw['rating'],
+        'URL': raw['url']
+    })
     
     # Sort by Category, then Brand, then Price
     df = df.sort_values(['Category', 'Brand', 'Price (SGD)'], ascending=[True, True, False])
     
-    # Save to Excel
-    excel_path = '/home/ubuntu/UnidBox_Product_Catalog.xlsx'
-    
-    with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-        # Main catalog sheet
-        df.to_excel(writer, sheet_name='All Products', index=False)
-        
-        # Category summary sheet
-        category_summary = df.groupby('Category').agg({
-            'Item ID': 'count',
-            'Price (SGD)': ['min', 'max', 'mean']
-        }).round(2)
-        category_summary.columns = ['Product Count', 'Min Price', 'Max Price', 'Avg Price']
-        category_summary = category_summary.sort_values('Product Count', ascending=False)
-        category_summary.to_excel(writer, sheet_name='Category Summary')
-        
-        # Brand summary sheet
-        brand_summary = df.groupby('Brand').agg({
-            'Item ID': 'count',
-            'Price (SGD)': ['min', 'max', 'mean']
-        }).round(2)
-        brand_summary.columns = ['Product Count', 'Min Price', 'Max Price', 'Avg Price']
-        brand_summary = brand_summary.sort_values('Product Count', ascending=False)
-        brand_summary.to_excel(writer, sheet_name='Brand Summary')
-    
-    print(f"Saved Excel catalog to: {excel_path}")
-    
-    # Also save as CSV for easy import
+    # Save as CSV for easy import
     csv_path = '/home/ubuntu/UnidBox_Product_Catalog.csv'
     df.to_csv(csv_path, index=False)
     print(f"Saved CSV catalog to: {csv_path}")
     
+    # Parquet keeps column types, so empty original prices are stored as
+    # nulls in a float column. The scraped fields passed through as-is can
+    # mix numbers with '' for missing values, which Arrow cannot store in
+    # one column, so they are written as text like in the CSV
+    if PARQUET_AVAILABLE:
+        parquet_path = '/home/ubuntu/UnidBox_Product_Catalog.parquet'
+        parquet_df = df.assign(**{
+            'Original Price (SGD)': pd.to_numeric(df['Original Price (SGD)'], errors='coerce'),
+            **{column: df[column].astype(str) for column in PASS_THROUGH_COLUMNS}
+        })
+        try:
+            parquet_df.to_parquet(parquet_path, engine='pyarrow', compression='zstd', index=False)
+            print(f"Saved Parquet catalog to: {parquet_path}")
+        except Exception as e:
+            print(f"Skipped Parquet catalog: {e}")
+    else:
+        print("Skipped Parquet catalog (install pyarrow to write it)")
+    
+    # The Excel workbook is the slowest output, so only build it on request
+    if args.xlsx:
+        excel_path = '/home/ubuntu/UnidBox_Product_Catalog.xlsx'
+        write_excel(df, excel_path)
+        print(f"Saved Excel catalog to: {excel_path}")
+    
     # Print summary
     print("\n" + "="*60)
     print("UNIDBOX HARDWARE PRODUCT CATALOG SUMMARY")
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+JSON file helpers shared by the catalog scripts
+
+orjson is optional; when installed it parses and serializes the scraped
+data several times faster than the standard json module.
+"""
+
+import json
+import mmap
+
+try:
+    import orjson
+    
+    def read_json(path):
+        """Load a JSON file, parsing straight from a memory map of it"""
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    return orjson.loads(view)
+    
+    def write_json(obj, path):
+        """Write obj to path as UTF-8 JSON indented by two spaces"""
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+except ImportError:
+    def read_json(path):
+        """Load a JSON file"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def write_json(obj, path):
+        """Write obj to path as UTF-8 JSON indented by two spaces"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, indent=2, ensure_ascii=False)
@@ -3,48 +3,49 @@
 Merge downloaded images with product catalog
 """
 
-import json
 import os
-import glob
 import shutil
 
+from json_io import read_json, write_json
+
 def main():
     # Load product catalog
-    with open('/home/ubuntu/unidbox_products_final.json', 'r') as f:
-        products = json.load(f)
+    products = read_json('/home/ubuntu/unidbox_products_final.json')
     
     print(f"Loaded {len(products)} products from catalog")
     
     # Get all downloaded images
     img_dir = '/home/ubuntu/unidbox_images'
-    images = glob.glob(os.path.join(img_dir, '*.*'))
-    
-    print(f"Found {len(images)} downloaded images")
-    
-    # Create mapping of item_id to image path
+    # Create mapping of item_id to image path from a single directory scan;
+    # DirEntry carries the name, so no per-file basename() or stat() is needed
     image_map = {}
-    for img_path in images:
-        filename = os.path.basename(img_path)
-        # Extract item_id from filename (format: itemid_name.ext)
-        item_id = filename.split('_')[0]
-        image_map[item_id] = img_path
+    image_count = 0
+    with os.scandir(img_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            # Same files glob('*.*') matched: visible files with an extension
+            if name.startswith('.') or '.' not in name or not entry.is_file():
+                continue
+            # Extract item_id from filename (format: itemid_name.ext)
+            image_map[name.split('_', 1)[0]] = entry.path
+            image_count += 1
+    
+    print(f"Found {image_count} downloaded images")
     
     # Match images with products
     matched = 0
     for product in products:
-        item_id = product.get('item_id', '')
-        if item_id in image_map:
-            product['image_path'] = image_map[item_id]
-            product['has_image'] = True
+        # One hash lookup per product instead of a membership test plus index
+        image_path = image_map.get(product.get('item_id', ''))
+        if image_path is not None:
+            product['image_path'] = image_path
             matched += 1
-        else:
-            product['has_image'] = False
+        product['has_image'] = image_path is not None
     
     print(f"Matched {matched} products with images")
     
     # Save updated catalog
-    with open('/home/ubuntu/unidbox_products_with_images.json', 'w') as f:
-        json.dump(products, f, indent=2, ensure_ascii=False)
+    write_json(products, '/home/ubuntu/unidbox_products_with_images.json')
     
     print("Saved updated catalog to /home/ubuntu/unidbox_products_with_images.json")
     
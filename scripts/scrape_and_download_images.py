@@ -4,79 +4,169 @@ Download product images using the image URLs we have from page 1
 Then merge with product catalog
 """
 
-import json
+import asyncio
 import os
-import requests
-import time
 import re
+import time
 
-def download_image(item_id, image_url, name, img_dir):
-    """Download a single image"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
-        'Referer': 'https://www.lazada.sg/'
-    }
+import httpx
+
+from json_io import read_json, write_json
+
+# tqdm is optional; without it progress is not shown and only the final
+# summary is printed
+try:
+    from tqdm import tqdm
+except ImportError:
+    class tqdm:
+        """Stand-in for the tqdm progress bar that displays nothing"""
+        
+        def __init__(self, *args, **kwargs):
+            pass
+        
+        def __enter__(self):
+            return self
+        
+        def __exit__(self, *exc):
+            return False
+        
+        def set_postfix(self, *args, **kwargs):
+            pass
+        
+        def update(self, n=1):
+            pass
+
+# HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 without it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
+    'Referer': 'https://www.lazada.sg/'
+}
+
+# Maximum number of downloads in flight at once, and the rate new ones
+# start at, to stay polite to the third-party CDN
+CONCURRENCY = 8
+REQUESTS_PER_SECOND = 5
+
+# Read size when streaming an image to disk
+CHUNK_SIZE = 256 * 1024
+
+# Characters replaced with '_' when building a filename from a product name
+UNSAFE_FILENAME_CHARS = re.compile(r'[^\w\-]')
+
+class RateLimiter:
+    """Spaces out request starts from any number of tasks to a fixed rate"""
+    
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_time = time.monotonic()
     
+    async def wait(self):
+        """Sleep until the caller's slot comes up"""
+        now = time.monotonic()
+        delay = self.next_time - now
+        self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+async def download_image(client, limit, limiter, item_id, image_url, name, img_dir, existing):
+    """Download a single image"""
     # Fix double .jpg extension
     image_url = image_url.replace('.jpg.jpg', '.jpg')
     
     # Create safe filename
-    safe_name = re.sub(r'[^\w\-]', '_', name)[:40]
-    save_path = os.path.join(img_dir, f"{item_id}_{safe_name}.jpg")
+    safe_name = UNSAFE_FILENAME_CHARS.sub('_', name)[:40]
+    filename = f"{item_id}_{safe_name}.jpg"
+    save_path = os.path.join(img_dir, filename)
     
-    if os.path.exists(save_path):
+    if filename in existing:
         return {'item_id': item_id, 'status': 'exists', 'path': save_path}
     
     try:
-        response = requests.get(image_url, headers=headers, timeout=30, stream=True)
-        if response.status_code == 200:
-            with open(save_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            return {'item_id': item_id, 'status': 'success', 'path': save_path}
-        else:
-            return {'item_id': item_id, 'status': 'failed', 'error': f'HTTP {response.status_code}'}
+        async with limit:
+            await limiter.wait()
+            async with client.stream('GET', image_url) as response:
+                if response.status_code == 200:
+                    with open(save_path, 'wb') as f:
+                        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                            f.write(chunk)
+                    return {'item_id': item_id, 'status': 'success', 'path': save_path}
+                else:
+                    return {'item_id': item_id, 'status': 'failed', 'error': f'HTTP {response.status_code}'}
     except Exception as e:
         return {'item_id': item_id, 'status': 'failed', 'error': str(e)}
 
+async def download_all(image_data, img_dir):
+    """Download all images concurrently over one multiplexed client"""
+    results = {'success': 0, 'failed': 0, 'exists': 0}
+    image_paths = {}
+    errors = []
+    
+    limit = asyncio.Semaphore(CONCURRENCY)
+    limiter = RateLimiter(REQUESTS_PER_SECOND)
+    
+    # One directory listing instead of a stat() per image
+    existing = {entry.name for entry in os.scandir(img_dir)}
+    limits = httpx.Limits(max_connections=CONCURRENCY, max_keepalive_connections=CONCURRENCY)
+    
+    # With HTTP/2 the image GETs share a single connection to the CDN
+    async with httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=limits, headers=HEADERS, timeout=30) as client:
+        async def fetch(item):
+            result = await download_image(
+                client,
+                limit,
+                limiter,
+                item['item_id'],
+                item['image_url'],
+                item.get('name', ''),
+                img_dir,
+                existing
+            )
+            return item, result
+        
+        tasks = [fetch(item) for item in image_data]
+        # One progress bar refresh instead of a printed line per image;
+        # failures are collected and reported once at the end
+        with tqdm(total=len(image_data), unit='img') as pbar:
+            for task in asyncio.as_completed(tasks):
+                item, result = await task
+                
+                status = result['status']
+                results[status] = results.get(status, 0) + 1
+                
+                if status in ['success', 'exists']:
+                    image_paths[result['item_id']] = result['path']
+                else:
+                    errors.append(f"{item.get('name', '')[:40]} - {result.get('error', '')}")
+                
+                pbar.set_postfix(results, refresh=False)
+                pbar.update(1)
+    
+    return results, image_paths, errors
+
 def main():
     # Load page 1 images
-    with open('/home/ubuntu/page1_images.json', 'r') as f:
-        image_data = json.load(f)
+    image_data = read_json('/home/ubuntu/page1_images.json')
     
     print(f"Processing {len(image_data)} products from page 1...")
     
     img_dir = '/home/ubuntu/unidbox_images'
     os.makedirs(img_dir, exist_ok=True)
     
-    results = {'success': 0, 'failed': 0, 'exists': 0}
-    image_paths = {}
-    
-    for i, item in enumerate(image_data):
-        result = download_image(
-            item['item_id'],
-            item['image_url'],
-            item.get('name', ''),
-            img_dir
-        )
-        
-        status = result['status']
-        results[status] = results.get(status, 0) + 1
-        
-        if status in ['success', 'exists']:
-            image_paths[result['item_id']] = result['path']
-            print(f"[{i+1}/{len(image_data)}] ✓ {item.get('name', '')[:40]}")
-        else:
-            print(f"[{i+1}/{len(image_data)}] ✗ {item.get('name', '')[:40]} - {result.get('error', '')}")
-        
-        time.sleep(0.2)
+    results, image_paths, errors = asyncio.run(download_all(image_data, img_dir))
     
     print(f"\nResults: {results['success']} downloaded, {results['exists']} existed, {results['failed']} failed")
+    for error in errors:
+        print(f"  ✗ {error}")
     
     # Save image paths mapping
-    with open('/home/ubuntu/image_paths.json', 'w') as f:
-        json.dump(image_paths, f, indent=2)
+    write_json(image_paths, '/home/ubuntu/image_paths.json')
     
     print(f"\nImages saved to {img_dir}/")
     print(f"Image paths saved to /home/ubuntu/image_paths.json")